@@ -13,16 +13,10 @@ bl_info = {
 import bpy
 from bpy.props import StringProperty
 from bpy.types import Panel, Operator
-import os
-import sys
-
-# Add the current directory to Python path for imports
-current_dir = os.path.dirname(os.path.abspath(__file__))
-if current_dir not in sys.path:
-    sys.path.append(current_dir)
 
 from . import ui_panel
 from . import agent_bridge
+from .agent_bridge import get_bridge
 from .ops import run_prompt, export_scene
 
 # Global properties
@@ -85,10 +79,9 @@ class FORGECORE_OT_ask_qa(Operator):
 
     def execute(self, context):
         question = context.scene.forgecore_qa_question
-        # Import agent bridge and get answer
+        # Get answer from the agent bridge
         try:
-            from .agent_bridge import AgentBridge
-            bridge = getattr(AgentBridge, 'instance', None)
+            bridge = get_bridge()
             if bridge and bridge.agent_core:
                 answer = bridge.agent_core.router._handle_knowledge_query(question)
             else:
@@ -106,8 +99,7 @@ class FORGECORE_OT_run_tool(Operator):
     def execute(self, context):
         tool_cmd = context.scene.forgecore_tool_input
         try:
-            from .agent_bridge import AgentBridge
-            bridge = getattr(AgentBridge, 'instance', None)
+            bridge = get_bridge()
             if bridge and bridge.agent_core:
                 result = bridge.agent_core.router._handle_tool(tool_cmd)
             else:
@@ -124,12 +116,10 @@ class FORGECORE_OT_clear_history(Operator):
 
     def execute(self, context):
         try:
-            from .agent_bridge import AgentBridge
-            bridge = getattr(AgentBridge, 'instance', None)
+            bridge = get_bridge()
             if bridge and bridge.agent_core:
-                bridge.agent_core.memory['history'] = []
-                bridge.agent_core.history = []
-                bridge.agent_core._save_memory()
+                bridge.agent_core.clear_history()
+            ui_panel.refresh_activity()
         except Exception as e:
             print(f"Error clearing history: {e}")
         return {'FINISHED'}
@@ -141,21 +131,27 @@ class FORGECORE_OT_analyze_scene(Operator):
 
     def execute(self, context):
         try:
-            import bpy
-            objects = [obj for obj in bpy.context.scene.objects]
-            meshes = [obj for obj in objects if obj.type == 'MESH']
-            lights = [obj for obj in objects if obj.type == 'LIGHT']
-            cameras = [obj for obj in objects if obj.type == 'CAMERA']
-            summary = f"Objects: {len(objects)}, Meshes: {len(meshes)}, Lights: {len(lights)}, Cameras: {len(cameras)}"
+            # Count object types in a single pass over the scene
+            counts = {'MESH': 0, 'LIGHT': 0, 'CAMERA': 0}
+            total = 0
+            for obj in context.scene.objects:
+                total += 1
+                count = counts.get(obj.type)
+                if count is not None:
+                    counts[obj.type] = count + 1
+            summary = f"Objects: {total}, Meshes: {counts['MESH']}, Lights: {counts['LIGHT']}, Cameras: {counts['CAMERA']}"
         except Exception as e:
             summary = f"Scene analysis error: {e}"
         context.scene.forgecore_scene_summary = summary
         return {'FINISHED'}
 
 classes = [
+    ui_panel.FORGECORE_PG_activity_entry,
+    ui_panel.FORGECORE_UL_activity,
     ui_panel.FORGECORE_PT_main_panel,
     ui_panel.FORGECORE_PT_journal_panel,
     run_prompt.FORGECORE_OT_run_prompt,
+    run_prompt.FORGECORE_OT_save_journal,
     export_scene.FORGECORE_OT_export_scene,
     FORGECORE_OT_ask_qa,
     FORGECORE_OT_run_tool,
@@ -163,16 +159,50 @@ classes = [
     FORGECORE_OT_analyze_scene,
 ]
 
+_register_classes, _unregister_classes = bpy.utils.register_classes_factory(classes)
+
+def _deferred_initialize():
+    """Timer callback that initializes the agent bridge after registration"""
+    agent_bridge.initialize()
+    return None
+
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    # Registering twice (e.g. a reload without unregister) would raise
+    if getattr(classes[0], 'is_registered', False):
+        return
     
-    # Initialize the agent bridge
-    agent_bridge.initialize()
+    _register_classes()
+    # Written by the run-prompt operator and shown in the main panel
+    bpy.types.Scene.forgecore_status = StringProperty(
+        name="Status",
+        description="Status of the last prompt run",
+        default=""
+    )
+    bpy.types.Scene.forgecore_last_result = StringProperty(
+        name="Last Result",
+        description="Result of the last prompt run",
+        default=""
+    )
+    ui_panel.register_properties()
+    export_scene.register_handlers()
+    run_prompt.register_handlers()
+    ui_panel.register_timers()
+    
+    # Initialize the agent bridge once Blender is idle, so loading memory
+    # does not hold up addon enablement
+    bpy.app.timers.register(_deferred_initialize, first_interval=0.0)
 
 def unregister():
-    for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
+    if bpy.app.timers.is_registered(_deferred_initialize):
+        bpy.app.timers.unregister(_deferred_initialize)
+    
+    ui_panel.unregister_timers()
+    run_prompt.unregister_handlers()
+    export_scene.unregister_handlers()
+    ui_panel.unregister_properties()
+    del bpy.types.Scene.forgecore_status
+    del bpy.types.Scene.forgecore_last_result
+    _unregister_classes()
     
     # Cleanup the agent bridge
     agent_bridge.cleanup()
@@ -1,23 +1,31 @@
-import bpy
 import os
-import sys
-import json
+import time
 from datetime import datetime
+from collections import deque
+from typing import Optional
 
-# Add the agent_core directory to the path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-agent_core_dir = os.path.join(current_dir, "agent_core")
-if agent_core_dir not in sys.path:
-    sys.path.append(agent_core_dir)
+from .agent_core import json_utils
+
+memory_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_core", "memory")
+memory_file = os.path.join(memory_dir, "memory_store.json")
+# Prompts and results are appended here one JSON object per line
+memory_log_file = os.path.join(memory_dir, "memory_store.jsonl")
+# Bytes read per step when tailing the log
+MEMORY_TAIL_BLOCK = 8192
+# Once the log grows past this size it is trimmed to the newest entries on startup
+MEMORY_LOG_COMPACT_BYTES = 4 * 1024 * 1024
+MEMORY_MAX_ENTRIES = 1000
 
 class AgentBridge:
     """Bridge between Blender and Agent Zero core logic"""
+    __slots__ = ('agent_core', 'memory_store', 'initialized', '_log_fh')
     instance = None
     
     def __init__(self):
         self.agent_core = None
         self.memory_store = {}
         self.initialized = False
+        self._log_fh = None
         AgentBridge.instance = self
         
     def initialize(self):
@@ -25,11 +33,12 @@ class AgentBridge:
         try:
             # Import the agent core
             from .agent_core import main as agent_main
-            self.agent_core = agent_main
+            self.agent_core = agent_main.get_agent_core()
             self.initialized = True
             
-            # Initialize memory store
+            # Initialize memory store and open the append-only log
             self._load_memory()
+            self._open_log()
             
             print("ForgeCore AI: Agent bridge initialized successfully")
             
@@ -40,7 +49,9 @@ class AgentBridge:
     def cleanup(self):
         """Cleanup resources"""
         try:
-            self._save_memory()
+            if self._log_fh:
+                self._log_fh.close()
+                self._log_fh = None
             self.initialized = False
             print("ForgeCore AI: Agent bridge cleaned up")
         except Exception as e:
@@ -51,63 +62,93 @@ class AgentBridge:
         if not self.initialized:
             return "# Error: Agent bridge not initialized"
         
+        timestamp = time.time_ns()
         try:
             # Log the prompt
-            self._log_prompt(prompt)
+            self._log_prompt(prompt, timestamp)
             
             # Process the prompt through Agent Zero core
             blender_code = self.agent_core.handle_prompt(prompt)
             
             # Log the result
-            self._log_result(prompt, blender_code)
+            self._log_result(prompt, blender_code, timestamp)
             
             return blender_code
             
         except Exception as e:
             error_msg = f"# Error processing prompt: {str(e)}"
-            self._log_result(prompt, error_msg)
+            self._log_result(prompt, error_msg, timestamp)
             return error_msg
     
-    def _log_prompt(self, prompt: str):
+    def _log_prompt(self, prompt: str, timestamp: Optional[int] = None):
         """Log a prompt to memory"""
-        timestamp = datetime.now().isoformat()
-        log_entry = {
-            'timestamp': timestamp,
+        if timestamp is None:
+            timestamp = time.time_ns()
+        self._append_log({
             'type': 'prompt',
+            'timestamp': timestamp,
             'content': prompt
-        }
-        
-        if 'prompts' not in self.memory_store:
-            self.memory_store['prompts'] = []
-        
-        self.memory_store['prompts'].append(log_entry)
-        self._save_memory()
+        })
     
-    def _log_result(self, prompt: str, result: str):
+    def _log_result(self, prompt: str, result: str, timestamp: Optional[int] = None):
         """Log a result to memory"""
-        timestamp = datetime.now().isoformat()
-        log_entry = {
-            'timestamp': timestamp,
+        if timestamp is None:
+            timestamp = time.time_ns()
+        self._append_log({
             'type': 'result',
+            'timestamp': timestamp,
             'prompt': prompt,
             'content': result
-        }
-        
-        if 'results' not in self.memory_store:
-            self.memory_store['results'] = []
-        
-        self.memory_store['results'].append(log_entry)
-        self._save_memory()
+        })
+    
+    def _append_log(self, entry: dict):
+        """Append a single entry to the JSONL log"""
+        if not self._log_fh:
+            return
+        try:
+            self._log_fh.write(json_utils.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"ForgeCore AI: Error writing memory log: {e}")
+    
+    def _open_log(self):
+        """Open the JSONL log, migrating entries from the legacy JSON store"""
+        try:
+            os.makedirs(memory_dir, exist_ok=True)
+            if os.path.exists(memory_log_file) and os.path.getsize(memory_log_file) > MEMORY_LOG_COMPACT_BYTES:
+                self._compact_log()
+            legacy = [
+                dict(entry, type=kind)
+                for key, kind in (('prompts', 'prompt'), ('results', 'result'))
+                for entry in self.memory_store.pop(key, None) or []
+            ]
+            self._log_fh = open(memory_log_file, 'a', buffering=1, encoding='utf-8')
+            if legacy:
+                legacy.sort(key=lambda entry: entry.get('timestamp', ''))
+                for entry in legacy:
+                    self._append_log(entry)
+                self._save_memory()
+        except Exception as e:
+            print(f"ForgeCore AI: Error opening memory log: {e}")
+            self._log_fh = None
+    
+    def _compact_log(self):
+        """Rewrite the log keeping only the newest MEMORY_MAX_ENTRIES lines"""
+        try:
+            with open(memory_log_file, 'r', encoding='utf-8') as f:
+                recent = deque(f, maxlen=MEMORY_MAX_ENTRIES)
+            tmp_file = memory_log_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.writelines(recent)
+            os.replace(tmp_file, memory_log_file)
+        except Exception as e:
+            print(f"ForgeCore AI: Error compacting memory log: {e}")
     
     def _load_memory(self):
         """Load memory from file"""
         try:
-            memory_dir = os.path.join(current_dir, "agent_core", "memory")
-            memory_file = os.path.join(memory_dir, "memory_store.json")
-            
             if os.path.exists(memory_file):
                 with open(memory_file, 'r') as f:
-                    self.memory_store = json.load(f)
+                    self.memory_store = json_utils.load(f)
             else:
                 self.memory_store = {}
                 
@@ -118,45 +159,74 @@ class AgentBridge:
     def _save_memory(self):
         """Save memory to file"""
         try:
-            memory_dir = os.path.join(current_dir, "agent_core", "memory")
             os.makedirs(memory_dir, exist_ok=True)
-            memory_file = os.path.join(memory_dir, "memory_store.json")
-            
             with open(memory_file, 'w') as f:
-                json.dump(self.memory_store, f, indent=2)
+                json_utils.dump(self.memory_store, f)
                 
         except Exception as e:
             print(f"ForgeCore AI: Error saving memory: {e}")
     
+    def _read_recent(self, kind: str, limit: int) -> list:
+        """Tail-read the last `limit` log entries of the given type"""
+        if limit <= 0 or not os.path.exists(memory_log_file):
+            return []
+        # Quotes inside JSON string values are escaped, so this marker can
+        # only match an entry's own compact "type" field
+        marker = f'"type":"{kind}"'.encode('utf-8')
+        found = []
+        try:
+            # Walk the file backwards in blocks so only the tail is read
+            with open(memory_log_file, 'rb') as f:
+                pos = f.seek(0, os.SEEK_END)
+                partial = b''
+                while pos > 0 and len(found) < limit:
+                    step = min(MEMORY_TAIL_BLOCK, pos)
+                    pos -= step
+                    f.seek(pos)
+                    lines = (f.read(step) + partial).split(b'\n')
+                    # The first piece may be cut mid-line; keep it for the next block
+                    partial = lines[0]
+                    for line in reversed(lines[1:]):
+                        if marker in line:
+                            found.append(line)
+                            if len(found) == limit:
+                                break
+                if pos == 0 and len(found) < limit and marker in partial:
+                    found.append(partial)
+            return [json_utils.loads(line) for line in reversed(found)]
+        except Exception as e:
+            print(f"ForgeCore AI: Error reading memory log: {e}")
+            return []
+    
     def get_recent_prompts(self, limit: int = 5) -> list:
         """Get recent prompts from memory"""
-        if 'prompts' in self.memory_store:
-            return self.memory_store['prompts'][-limit:]
-        return []
+        return self._read_recent('prompt', limit)
     
     def get_recent_results(self, limit: int = 5) -> list:
         """Get recent results from memory"""
-        if 'results' in self.memory_store:
-            return self.memory_store['results'][-limit:]
-        return []
+        return self._read_recent('result', limit)
 
-# Global instance
-_agent_bridge = None
+def format_timestamp(timestamp) -> str:
+    """Format a log timestamp for display.
+    Log entries store epoch nanoseconds; older entries may hold epoch
+    seconds or an ISO string, which are handled too."""
+    if isinstance(timestamp, int):
+        return datetime.fromtimestamp(timestamp / 1e9).isoformat()
+    if isinstance(timestamp, float):
+        return datetime.fromtimestamp(timestamp).isoformat()
+    return str(timestamp)
 
 def initialize():
     """Initialize the global agent bridge"""
-    global _agent_bridge
-    _agent_bridge = AgentBridge()
-    _agent_bridge.initialize()
+    AgentBridge().initialize()
 
 def cleanup():
     """Cleanup the global agent bridge"""
-    global _agent_bridge
-    if _agent_bridge:
-        _agent_bridge.cleanup()
-        _agent_bridge = None
+    bridge = AgentBridge.instance
+    if bridge:
+        bridge.cleanup()
+        AgentBridge.instance = None
 
 def get_bridge() -> AgentBridge:
     """Get the global agent bridge instance"""
-    global _agent_bridge
-    return _agent_bridge
\ No newline at end of file
+    return AgentBridge.instance
@@ -0,0 +1,36 @@
+"""
+JSON helpers - ForgeCore AI
+Uses orjson when it is installed and falls back to the standard library
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def loads(data):
+        """Parse JSON text or bytes"""
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        """Serialize to compact JSON text"""
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    def loads(data):
+        """Parse JSON text or bytes"""
+        return json.loads(data)
+
+    def dumps(obj) -> str:
+        """Serialize to compact JSON text"""
+        return json.dumps(obj, separators=(",", ":"))
+
+def load(f):
+    """Parse JSON from an open file"""
+    return loads(f.read())
+
+def dump(obj, f):
+    """Write compact JSON to an open file"""
+    f.write(dumps(obj))
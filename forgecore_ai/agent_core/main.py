@@ -1,107 +1,452 @@
 """
 ForgeCore AI - Main Agent Core
 Adapted from Agent Zero for Blender integration
+
+This module is string dispatch, JSON and I/O, so it stays plain CPython:
+no numba @njit here. Numeric helpers (e.g. heightmap or vertex math) belong
+in their own module under agent_core/modules, where they can be decorated
+with @numba.njit(cache=True) if profiling shows it pays off.
 """
 
 import re
-import json
-from typing import Dict, List, Optional
-from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 import os
 import subprocess
-import requests
-import random
+import sys
 import logging
 import threading
-import time
-import glob
-import urllib.parse
+
+from . import json_utils
+from .modules.generate_mesh import get_mesh_generator
+
+if TYPE_CHECKING:
+    import requests
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+_SPLIT_RE = re.compile(r'\band\b|;|\.')
+
+# Routing keyword bags, checked in priority order by PromptRouter.route_prompt.
+# A keyword also matches inside longer words ("meshes", "recreate", "metallic")
+CATEGORY_KEYWORDS: Dict[str, frozenset] = {
+    'mesh': frozenset({'cube', 'sphere', 'cylinder', 'mesh', 'object', 'model', 'create'}),
+    'material': frozenset({'material', 'texture', 'shader', 'color', 'metal', 'wood'}),
+    'layout': frozenset({'layout', 'arrange', 'position', 'scene', 'setup'}),
+    'camera': frozenset({'camera', 'view', 'render'}),
+    'lighting': frozenset({'light', 'lighting', 'illuminate'}),
+    'animation': frozenset({'animate', 'animation', 'keyframe'}),
+    'export': frozenset({'export', 'save', 'fbx', 'obj'}),
+    'knowledge': frozenset({'faq', 'question', 'explain'}),
+    'tool': frozenset({'tool'}),
+    'procedural': frozenset({'procedural'}),
+    'scene_analysis': frozenset(),
+}
+
+# Multi-word triggers that cannot be expressed as single tokens
+CATEGORY_PHRASES: Dict[str, tuple] = {
+    'knowledge': ('how do i', 'what is', 'how to'),
+    'tool': ('run python', 'execute code', 'web search', 'list files', 'delete file'),
+    'procedural': ('generate city', 'generate terrain'),
+    'scene_analysis': ('analyze scene', 'scene analysis', 'summarize scene'),
+}
+
+# One alternation over every phrase, with a named group per category so a
+# single scan reports which categories matched on word boundaries
+_PHRASE_RE = re.compile("|".join(
+    f"(?P<{name}>" + "|".join(
+        r"\b" + r"\s+".join(map(re.escape, phrase.split())) + r"\b" for phrase in phrases
+    ) + ")"
+    for name, phrases in CATEGORY_PHRASES.items()
+))
+
+def _tokenize(prompt_lower: str) -> frozenset:
+    """Split a lowercased prompt into its set of word tokens, adding both
+    possible singulars of each plural so "cubes" matches "cube" and
+    "glasses" matches "glass" """
+    words = _TOKEN_RE.findall(prompt_lower)
+    tokens = set(words)
+    for word in words:
+        if len(word) > 3 and word[-1] == 's':
+            tokens.add(word[:-1])
+            if word[-2] == 'e':
+                tokens.add(word[:-2])
+    return frozenset(tokens)
+
+def _match_phrases(prompt_lower: str) -> frozenset:
+    """Return the categories whose multi-word phrases occur in the prompt"""
+    return frozenset(match.lastgroup for match in _PHRASE_RE.finditer(prompt_lower))
+
+# Category priority order and one bit per category; lower bits win
+_CATEGORY_ORDER = tuple(CATEGORY_KEYWORDS)
+_CATEGORY_BITS = {name: 1 << i for i, name in enumerate(_CATEGORY_ORDER)}
+
+# Keyword -> bitmask of the categories it triggers
+_KEYWORD_MASKS: Dict[str, int] = {}
+for _name, _keywords in CATEGORY_KEYWORDS.items():
+    for _word in _keywords:
+        _KEYWORD_MASKS[_word] = _KEYWORD_MASKS.get(_word, 0) | _CATEGORY_BITS[_name]
+del _name, _keywords, _word
+
+TOKEN_MASK_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=TOKEN_MASK_CACHE_SIZE)
+def _token_mask(token: str) -> int:
+    """Bitmask of the categories with a keyword inside `token`. Keywords are
+    letters only, so this matches exactly where the old substring scan of the
+    whole prompt did; each distinct word is scanned once."""
+    mask = 0
+    for word, word_mask in _KEYWORD_MASKS.items():
+        if word in token:
+            mask |= word_mask
+    return mask
+
+# Any keyword bit below this outranks every phrase-only category
+_PHRASE_MIN_BIT = min(_CATEGORY_BITS[name] for name in CATEGORY_PHRASES)
+
+def _classify(prompt_lower: str, tokens: frozenset) -> str:
+    """Return the highest-priority category matched by the prompt, or 'utility'"""
+    mask = 0
+    for token in tokens:
+        mask |= _token_mask(token)
+    # Only scan for phrases when they could still change the winner
+    if not mask & (_PHRASE_MIN_BIT - 1):
+        for name in _match_phrases(prompt_lower):
+            mask |= _CATEGORY_BITS[name]
+    if not mask:
+        return 'utility'
+    return _CATEGORY_ORDER[(mask & -mask).bit_length() - 1]
+
+def _classify_prompt(prompt: str) -> str:
+    """Classify a raw prompt without routing it"""
+    prompt_lower = prompt.lower()
+    return _classify(prompt_lower, _tokenize(prompt_lower))
+
+# "<count> <primitive>" mentions in a mesh prompt, e.g. "10 cubes" or "sphere"
+_PRIMITIVE_RE = re.compile(r"\b(?:(\d+)\s+)?(cube|sphere|cylinder)s?\b")
+# Most primitives a single prompt may create
+MAX_BATCH_PRIMITIVES = 100
+# Distance between neighbouring primitives of a batch, laid out in a row along X
+BATCH_SPACING = 3.0
+
+# Fixed code fragments emitted by the PromptRouter handlers. Optional
+# fragments carry their own leading newline so handlers can splice them
+# into an f-string template or leave them out as ''. The _forgecore_make_*
+# primitive builders come from modules/mesh_builders.py, whose SCRIPT_HELPERS
+# the run-prompt operator execs generated scripts with
+_MESH_SMOOTH = (
+    "\nmodifier = obj.modifiers.new(name='Smooth', type='SUBSURF')\n"
+    "modifier.levels = 2"
+)
+_MESH_BEVEL = (
+    "\nbevel = obj.modifiers.new(name='Bevel', type='BEVEL')\n"
+    "bevel.width = 0.1"
+)
+
+_MATERIAL_HEADER = (
+    "material = bpy.data.materials.new(name='Generated_Material')\n"
+    "material.use_nodes = True\n"
+    "nodes = material.node_tree.nodes\n"
+    "links = material.node_tree.links\n"
+    "nodes.clear()\n"
+    "principled = nodes.new(type='ShaderNodeBsdfPrincipled')\n"
+    "output = nodes.new(type='ShaderNodeOutputMaterial')\n"
+    "links.new(principled.outputs['BSDF'], output.inputs['Surface'])"
+)
+_MATERIAL_METAL = (
+    "\nprincipled.inputs['Metallic'].default_value = 1.0\n"
+    "principled.inputs['Roughness'].default_value = 0.1"
+)
+_MATERIAL_PLASTIC = (
+    "\nprincipled.inputs['Metallic'].default_value = 0.0\n"
+    "principled.inputs['Roughness'].default_value = 0.3"
+)
+_MATERIAL_GLASS = (
+    "\nprincipled.inputs['Transmission'].default_value = 1.0\n"
+    "principled.inputs['IOR'].default_value = 1.45"
+)
+_MATERIAL_RED = "\nprincipled.inputs['Base Color'].default_value = (1, 0, 0, 1)"
+_MATERIAL_BLUE = "\nprincipled.inputs['Base Color'].default_value = (0, 0, 1, 1)"
+_MATERIAL_GREEN = "\nprincipled.inputs['Base Color'].default_value = (0, 1, 0, 1)"
+_MATERIAL_APPLY = (
+    "for obj in bpy.context.selected_objects:\n"
+    "    if obj.type == 'MESH':\n"
+    "        if obj.data.materials:\n"
+    "            obj.data.materials[0] = material\n"
+    "        else:\n"
+    "            obj.data.materials.append(material)"
+)
+
+_SCENE_LAYOUT = (
+    "layout_collection = bpy.data.collections.new('Layout_Collection')\n"
+    "bpy.context.scene.collection.children.link(layout_collection)\n"
+    "if not bpy.data.cameras:\n"
+    "    bpy.ops.object.camera_add(location=(5, -5, 3))\n"
+    "    camera = bpy.context.active_object\n"
+    "    camera.rotation_euler = (1.1, 0, 0.785)\n"
+    "    bpy.context.scene.camera = camera\n"
+    "if not bpy.data.lights:\n"
+    "    bpy.ops.object.light_add(type='SUN', location=(5, 5, 10))\n"
+    "    sun = bpy.context.active_object\n"
+    "    sun.data.energy = 5.0\n"
+    "objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']\n"
+    "for i, obj in enumerate(objects):\n"
+    "    row = i // 3\n"
+    "    col = i % 3\n"
+    "    obj.location = (col * 3, row * 3, 0)"
+)
+
+_CAMERA_HEADER = (
+    "if not bpy.data.cameras:\n"
+    "    bpy.ops.object.camera_add()\n"
+    "camera = bpy.context.active_object\n"
+    "bpy.context.scene.camera = camera"
+)
+_CAMERA_CLOSE = "camera.location = (2, -2, 1.5)"
+_CAMERA_FAR = "camera.location = (10, -10, 5)"
+_CAMERA_DEFAULT = "camera.location = (5, -5, 3)"
+_CAMERA_ROTATION = "camera.rotation_euler = (1.1, 0, 0.785)"
+
+_LIGHTING_CLEAR = (
+    "for obj in bpy.context.scene.objects:\n"
+    "    if obj.type == 'LIGHT':\n"
+    "        bpy.data.objects.remove(obj, do_unlink=True)"
+)
+_LIGHTING_STUDIO = (
+    "bpy.ops.object.light_add(type='AREA', location=(3, 0, 2))\n"
+    "key_light = bpy.context.active_object\n"
+    "key_light.data.energy = 1000\n"
+    "key_light.data.size = 2\n"
+    "bpy.ops.object.light_add(type='AREA', location=(-3, 0, 2))\n"
+    "fill_light = bpy.context.active_object\n"
+    "fill_light.data.energy = 500\n"
+    "fill_light.data.size = 2"
+)
+_LIGHTING_DRAMATIC = (
+    "bpy.ops.object.light_add(type='SPOT', location=(0, 0, 5))\n"
+    "spot = bpy.context.active_object\n"
+    "spot.data.energy = 2000\n"
+    "spot.data.spot_size = 0.5"
+)
+_LIGHTING_DEFAULT = (
+    "bpy.ops.object.light_add(type='SUN', location=(5, 5, 10))\n"
+    "sun = bpy.context.active_object\n"
+    "sun.data.energy = 5.0"
+)
+
+_ANIMATION = (
+    "bpy.context.scene.frame_start = 1\n"
+    "bpy.context.scene.frame_end = 120\n"
+    "for obj in bpy.context.selected_objects:\n"
+    "    if obj.type == 'MESH':\n"
+    "        obj.keyframe_insert(data_path='location', frame=1)\n"
+    "        obj.location.z += 2\n"
+    "        obj.keyframe_insert(data_path='location', frame=60)\n"
+    "        obj.location.z -= 2\n"
+    "        obj.keyframe_insert(data_path='location', frame=120)"
+)
+
+_EXPORT = (
+    "import os\n"
+    "blend_path = bpy.data.filepath\n"
+    "if blend_path:\n"
+    "    export_dir = os.path.join(os.path.dirname(blend_path), 'exports')\n"
+    "    os.makedirs(export_dir, exist_ok=True)\n"
+    "    fbx_path = os.path.join(export_dir, 'scene.fbx')\n"
+    "    bpy.ops.export_scene.fbx(filepath=fbx_path)"
+)
+
+_UTILITY_HEADER = (
+    "# Utility operation\n"
+    "print('ForgeCore AI: Processing utility request')"
+)
+_UTILITY_CLEAR = (
+    "bpy.ops.object.select_all(action='SELECT')\n"
+    "bpy.ops.object.delete(use_global=False)"
+)
+_UTILITY_SELECT = "bpy.ops.object.select_all(action='SELECT')"
+_UTILITY_DESELECT = "bpy.ops.object.select_all(action='DESELECT')"
+
+_PROCEDURAL_CITY = (
+    "# Generate a grid of cubes as buildings\n"
+    "_forgecore_deselect_all()\n"
+    "for x in range(5):\n"
+    "    for y in range(5):\n"
+    "        _forgecore_make_cube(1, (x*2, y*2, 0))\n"
+)
+_PROCEDURAL_TERRAIN = (
+    "# Generate random terrain\n"
+    "_forgecore_deselect_all()\n"
+    "import random\n"
+    "for x in range(10):\n"
+    "    for y in range(10):\n"
+    "        z = random.uniform(0, 2)\n"
+    "        _forgecore_make_cube(1, (x, y, z))\n"
+)
+_PROCEDURAL_FOREST = (
+    "# Generate a forest of random trees\n"
+    "_forgecore_deselect_all()\n"
+    "import random\n"
+    "for i in range(20):\n"
+    "    x, y = random.uniform(-10, 10), random.uniform(-10, 10)\n"
+    "    _forgecore_make_cylinder(0.2, 2, (x, y, 1))\n"
+    "    _forgecore_make_uv_sphere(0.8, (x, y, 2))\n"
+)
+_PROCEDURAL_STAIRCASE = (
+    "# Generate a spiral staircase\n"
+    "_forgecore_deselect_all()\n"
+    "import math\n"
+    "steps = 20\n"
+    "radius = 2\n"
+    "for i in range(steps):\n"
+    "    angle = i * (math.pi / 8)\n"
+    "    x = math.cos(angle) * radius\n"
+    "    y = math.sin(angle) * radius\n"
+    "    z = i * 0.3\n"
+    "    _forgecore_make_cube(0.5, (x, y, z))\n"
+)
+_PROCEDURAL_ROCKS = (
+    "# Scatter rocks on terrain\n"
+    "_forgecore_deselect_all()\n"
+    "import random\n"
+    "for i in range(30):\n"
+    "    x, y = random.uniform(-10, 10), random.uniform(-10, 10)\n"
+    "    z = random.uniform(0, 1)\n"
+    "    _forgecore_make_ico_sphere(random.uniform(0.2, 0.6), (x, y, z))\n"
+)
+# Checked in order; the first keyword found in the prompt wins
+_PROCEDURAL_CODE = (
+    ('city', _PROCEDURAL_CITY),
+    ('terrain', _PROCEDURAL_TERRAIN),
+    ('forest', _PROCEDURAL_FOREST),
+    ('spiral staircase', _PROCEDURAL_STAIRCASE),
+    ('scatter rocks', _PROCEDURAL_ROCKS),
+)
+
+# Child-process runner for "run python" tool requests. The user code arrives
+# on stdin, its prints go to stderr and the final `result` goes to stdout.
+_SANDBOX_RUNNER = (
+    "import sys\n"
+    "def _print(*args, **kwargs):\n"
+    "    kwargs['file'] = sys.stderr\n"
+    "    print(*args, **kwargs)\n"
+    "safe_builtins = {'print': _print, 'range': range, 'len': len, 'str': str, 'int': int, 'float': float, 'bool': bool, 'list': list, 'dict': dict, 'set': set, 'tuple': tuple, 'enumerate': enumerate, 'abs': abs, 'min': min, 'max': max, 'sum': sum}\n"
+    "exec_locals = {}\n"
+    "try:\n"
+    "    exec(sys.stdin.read(), {'__builtins__': safe_builtins}, exec_locals)\n"
+    "    sys.stdout.write(str(exec_locals.get('result', 'Code executed.')))\n"
+    "except Exception as e:\n"
+    "    sys.stdout.write(f'Error executing code: {e}')\n"
+)
 
 class PromptRouter:
     """Routes prompts to appropriate handlers based on content"""
+    __slots__ = ('knowledge_base', '_faq_exact', '_faq_index')
+    
+    # (knowledge_base, faq_exact, faq_index), loaded once for all routers
+    _KB = None
+    _KB_LOCK = threading.Lock()
     
     def __init__(self):
-        self.handlers = {
-            'mesh': self._handle_mesh_generation,
-            'material': self._handle_material_generation,
-            'layout': self._handle_scene_layout,
-            'camera': self._handle_camera_setup,
-            'lighting': self._handle_lighting_setup,
-            'animation': self._handle_animation,
-            'export': self._handle_export,
-            'utility': self._handle_utility,
-            'knowledge': self._handle_knowledge_query,
-            'tool': self._handle_tool,
-            'procedural': self._handle_procedural,
-            'scene_analysis': self._handle_scene_analysis
-        }
-        # Load knowledge base
-        self.knowledge_base = self._load_knowledge_base()
+        # Share the knowledge base and its question index across instances
+        self.knowledge_base, self._faq_exact, self._faq_index = self._load_knowledge_base()
     
     def split_prompt(self, prompt: str) -> list:
         """Split a complex prompt into subtasks using conjunctions and punctuation."""
         # Simple split on 'and', ';', or '.'
-        parts = re.split(r'\band\b|;|\.', prompt)
-        return [p.strip() for p in parts if p.strip()]
+        return [part for part in map(str.strip, _SPLIT_RE.split(prompt)) if part]
+
+    def _load_knowledge_base(self) -> tuple:
+        """Return the shared knowledge base and FAQ index, loading them on first use."""
+        with PromptRouter._KB_LOCK:
+            if PromptRouter._KB is None:
+                knowledge_base = self._read_knowledge_base()
+                PromptRouter._KB = (knowledge_base,) + self._build_faq_index(knowledge_base)
+            return PromptRouter._KB
 
-    def _load_knowledge_base(self):
+    @staticmethod
+    def _read_knowledge_base() -> dict:
         """Load Blender knowledge base from a JSON file."""
         kb_path = os.path.join(os.path.dirname(__file__), '..', '..', 'knowledge', 'blender_faq.json')
         try:
-            with open(kb_path, 'r', encoding='utf-8') as f:
-                import json
-                return json.load(f)
+            # Hand the raw bytes to the parser; both orjson and json decode UTF-8 themselves
+            with open(kb_path, 'rb') as f:
+                return json_utils.loads(f.read())
         except Exception:
             return {}
 
-    def _handle_knowledge_query(self, prompt: str) -> str:
+    @staticmethod
+    def _build_faq_index(knowledge_base: dict) -> tuple:
+        """Index FAQ questions by exact text and by word token."""
+        faq_exact = {}
+        faq_index = defaultdict(list)
+        for i, entry in enumerate(knowledge_base.get('faqs', [])):
+            question = entry['question'].lower().strip()
+            faq_exact.setdefault(question, entry['answer'])
+            for token in _tokenize(question):
+                faq_index[token].append(i)
+        return faq_exact, faq_index
+
+    def _handle_knowledge_query(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Answer Blender/3D questions using the knowledge base."""
-        # Simple keyword search
-        q = prompt.lower().strip()
-        for entry in self.knowledge_base.get('faqs', []):
-            if q in entry['question'].lower():
-                return entry['answer']
-        # Fallback: try partial match
-        for entry in self.knowledge_base.get('faqs', []):
-            if any(word in entry['question'].lower() for word in q.split()):
-                return entry['answer']
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
+        answer = self._faq_exact.get(prompt_lower.strip())
+        if answer is not None:
+            return answer
+        # Fallback: the entry sharing the most words with the question wins
+        if tokens is None:
+            tokens = _tokenize(prompt_lower)
+        overlap = Counter()
+        for token in tokens:
+            overlap.update(self._faq_index.get(token, ()))
+        if overlap:
+            best = min(overlap, key=lambda i: (-overlap[i], i))
+            return self.knowledge_base['faqs'][best]['answer']
         return "Sorry, I don't know the answer to that question yet."
 
-    def _handle_tool(self, prompt: str) -> str:
+    def _handle_tool(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Handle custom tool requests: code execution, web search, file management."""
-        prompt_lower = prompt.lower()
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
+        if tokens is None:
+            tokens = _tokenize(prompt_lower)
         # Safer code execution
         if 'run python' in prompt_lower or 'execute code' in prompt_lower:
             code = prompt.split(':', 1)[-1].strip()
-            result = {'output': None, 'error': None}
-            def run_code():
-                try:
-                    # Restrict built-ins
-                    safe_builtins = {'print': print, 'range': range, 'len': len, 'str': str, 'int': int, 'float': float, 'bool': bool, 'list': list, 'dict': dict, 'set': set, 'tuple': tuple, 'enumerate': enumerate, 'abs': abs, 'min': min, 'max': max, 'sum': sum}
-                    exec_globals = {'__builtins__': safe_builtins}
-                    exec_locals = {}
-                    exec(code, exec_globals, exec_locals)
-                    result['output'] = exec_locals.get('result', 'Code executed.')
-                except Exception as e:
-                    result['error'] = f"Error executing code: {e}"
-            thread = threading.Thread(target=run_code)
-            thread.start()
-            thread.join(timeout=3)  # 3 second timeout
-            if thread.is_alive():
+            # Run in an isolated child so a hung script can be killed
+            try:
+                proc = subprocess.run(
+                    [sys.executable, '-I', '-S', '-c', _SANDBOX_RUNNER],
+                    input=code, capture_output=True, text=True, timeout=CODE_EXEC_TIMEOUT
+                )
+            except subprocess.TimeoutExpired:
                 return "Error: Code execution timed out."
-            if result['error']:
-                return result['error']
-            return str(result['output'])
+            except Exception as e:
+                return f"Error executing code: {e}"
+            if proc.stderr:
+                print(proc.stderr, end='')
+            if proc.returncode != 0:
+                return f"Error executing code: exit status {proc.returncode}"
+            return proc.stdout
         # Batch file operations
-        elif 'delete all' in prompt_lower and 'files' in prompt_lower:
+        elif 'delete all' in prompt_lower and 'files' in tokens:
             try:
                 parts = prompt_lower.split('delete all')[-1].split('files')[0].strip()
                 ext = parts if parts.startswith('.') else f'.{parts}' if parts else '.tmp'
                 path = prompt.split('in', 1)[-1].strip() if 'in' in prompt_lower else '.'
-                files = glob.glob(os.path.join(path, f'*{ext}'))
-                for f in files:
-                    os.remove(f)
+                # One directory read; skips hidden entries like the old glob did
+                with os.scandir(path) as it:
+                    files = [
+                        entry.path for entry in it
+                        if entry.name.endswith(ext) and not entry.name.startswith('.')
+                        and entry.is_file(follow_symlinks=False)
+                    ]
+                # unlink releases the GIL, so overlap the syscalls on the pool
+                for _ in _get_file_pool().map(os.remove, files):
+                    pass
                 return f"Deleted {len(files)} files with extension {ext} in {path}"
             except Exception as e:
                 logging.error(f"Batch file delete error: {e}")
@@ -111,11 +456,12 @@ class PromptRouter:
             try:
                 # Engine selection
                 engine = 'duckduckgo'
-                if 'google' in prompt_lower:
+                if 'google' in tokens:
                     engine = 'google'
                 query = prompt.split(':', 1)[-1].strip()
                 if engine == 'duckduckgo':
-                    resp = requests.get(f'https://api.duckduckgo.com/?q={urllib.parse.quote(query)}&format=json')
+                    import urllib.parse
+                    resp = _get_http_session().get(f'https://api.duckduckgo.com/?q={urllib.parse.quote(query)}&format=json', timeout=WEB_SEARCH_TIMEOUT)
                     if resp.ok:
                         data = resp.json()
                         abstract = data.get('AbstractText', '')
@@ -152,23 +498,16 @@ class PromptRouter:
         else:
             return "Unknown tool command."
 
-    def _handle_procedural(self, prompt: str) -> str:
+    def _handle_procedural(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Advanced procedural content generation."""
-        p = prompt.lower()
-        if 'city' in p:
-            return "# Generate a grid of cubes as buildings\nfor x in range(5):\n    for y in range(5):\n        bpy.ops.mesh.primitive_cube_add(size=1, location=(x*2, y*2, 0))\n"
-        elif 'terrain' in p:
-            return "# Generate random terrain\nimport random\nfor x in range(10):\n    for y in range(10):\n        z = random.uniform(0, 2)\n        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, z))\n"
-        elif 'forest' in p:
-            return "# Generate a forest of random trees\nimport random\nfor i in range(20):\n    x, y = random.uniform(-10, 10), random.uniform(-10, 10)\n    bpy.ops.mesh.primitive_cylinder_add(radius=0.2, depth=2, location=(x, y, 1))\n    bpy.ops.mesh.primitive_uv_sphere_add(radius=0.8, location=(x, y, 2))\n"
-        elif 'spiral staircase' in p:
-            return "# Generate a spiral staircase\nimport math\nsteps = 20\nradius = 2\nfor i in range(steps):\n    angle = i * (math.pi / 8)\n    x = math.cos(angle) * radius\n    y = math.sin(angle) * radius\n    z = i * 0.3\n    bpy.ops.mesh.primitive_cube_add(size=0.5, location=(x, y, z))\n"
-        elif 'scatter rocks' in p:
-            return "# Scatter rocks on terrain\nimport random\nfor i in range(30):\n    x, y = random.uniform(-10, 10), random.uniform(-10, 10)\n    z = random.uniform(0, 1)\n    bpy.ops.mesh.primitive_ico_sphere_add(radius=random.uniform(0.2, 0.6), location=(x, y, z))\n"
-        else:
-            return "Procedural generation not implemented for this prompt."
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
+        for keyword, code in _PROCEDURAL_CODE:
+            if keyword in prompt_lower:
+                return code
+        return "Procedural generation not implemented for this prompt."
 
-    def _handle_scene_analysis(self, prompt: str) -> str:
+    def _handle_scene_analysis(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Advanced scene analysis: list materials, unused meshes, animation data."""
         try:
             import bpy
@@ -188,282 +527,200 @@ class PromptRouter:
             unused_meshes = all_meshes - used_meshes
             # Animation data
             animated = [obj.name for obj in objects if obj.animation_data and obj.animation_data.action]
-            summary = f"Objects: {len(objects)}, Meshes: {len(meshes)}, Lights: {len(lights)}, Cameras: {len(cameras)}\n"
-            summary += f"Materials used: {', '.join(materials) if materials else 'None'}\n"
-            summary += f"Unused meshes: {', '.join(unused_meshes) if unused_meshes else 'None'}\n"
-            summary += f"Animated objects: {', '.join(animated) if animated else 'None'}"
-            return summary
+            return (
+                f"Objects: {len(objects)}, Meshes: {len(meshes)}, Lights: {len(lights)}, Cameras: {len(cameras)}\n"
+                f"Materials used: {', '.join(materials) if materials else 'None'}\n"
+                f"Unused meshes: {', '.join(unused_meshes) if unused_meshes else 'None'}\n"
+                f"Animated objects: {', '.join(animated) if animated else 'None'}"
+            )
         except Exception as e:
             logging.error(f"Scene analysis error: {e}")
             return f"Scene analysis error: {e}"
 
-    def route_prompt(self, prompt: str) -> str:
-        """Route a prompt to the appropriate handler and return Blender code. Supports multi-step prompts."""
+    def route_prompt(self, prompt: str) -> Union[str, List[str]]:
+        """Route a prompt to the appropriate handler and return Blender code.
+        Multi-step prompts return the list of subtasks for sub-agent orchestration."""
         subtasks = self.split_prompt(prompt)
         if len(subtasks) > 1:
-            # Multi-step: return a marker for sub-agent orchestration
-            return json.dumps({'multi_step': True, 'subtasks': subtasks})
+            return subtasks
         
         prompt_lower = prompt.lower()
+        category, code = _route_core(prompt_lower)
+        if code is not None:
+            return code
         
-        # Determine the type of operation based on keywords
-        if any(word in prompt_lower for word in ['cube', 'sphere', 'cylinder', 'mesh', 'object', 'model', 'create']):
-            return self._handle_mesh_generation(prompt)
-        elif any(word in prompt_lower for word in ['material', 'texture', 'shader', 'color', 'metal', 'wood']):
-            return self._handle_material_generation(prompt)
-        elif any(word in prompt_lower for word in ['layout', 'arrange', 'position', 'scene', 'setup']):
-            return self._handle_scene_layout(prompt)
-        elif any(word in prompt_lower for word in ['camera', 'view', 'render']):
-            return self._handle_camera_setup(prompt)
-        elif any(word in prompt_lower for word in ['light', 'lighting', 'illuminate']):
-            return self._handle_lighting_setup(prompt)
-        elif any(word in prompt_lower for word in ['animate', 'animation', 'keyframe']):
-            return self._handle_animation(prompt)
-        elif any(word in prompt_lower for word in ['export', 'save', 'fbx', 'obj']):
-            return self._handle_export(prompt)
-        elif any(word in prompt_lower for word in ['how do i', 'what is', 'how to', 'faq', 'question', 'explain']):
-            return self._handle_knowledge_query(prompt)
-        elif any(word in prompt_lower for word in ['tool', 'run python', 'execute code', 'web search', 'list files', 'delete file']):
-            return self._handle_tool(prompt)
-        if any(word in prompt_lower for word in ['generate city', 'generate terrain', 'procedural']):
-            return self._handle_procedural(prompt)
-        if any(word in prompt_lower for word in ['analyze scene', 'scene analysis', 'summarize scene']):
-            return self._handle_scene_analysis(prompt)
-        else:
-            return self._handle_utility(prompt)
+        # Stateful handlers (tools, knowledge, scene analysis) run every time
+        handler = self.handlers[category]
+        return handler(self, prompt, prompt_lower)
     
-    def _handle_mesh_generation(self, prompt: str) -> str:
+    def _handle_mesh_generation(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for mesh creation"""
-        code_lines = []
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
+        if tokens is None:
+            tokens = _tokenize(prompt_lower)
         
-        # Basic mesh creation based on prompt keywords
-        if 'cube' in prompt.lower():
-            code_lines.append("bpy.ops.mesh.primitive_cube_add(size=2, location=(0, 0, 0))")
-            code_lines.append("cube = bpy.context.active_object")
-            code_lines.append("cube.name = 'Generated_Cube'")
-        elif 'sphere' in prompt.lower():
-            code_lines.append("bpy.ops.mesh.primitive_uv_sphere_add(radius=1, location=(0, 0, 0))")
-            code_lines.append("sphere = bpy.context.active_object")
-            code_lines.append("sphere.name = 'Generated_Sphere'")
-        elif 'cylinder' in prompt.lower():
-            code_lines.append("bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=2, location=(0, 0, 0))")
-            code_lines.append("cylinder = bpy.context.active_object")
-            code_lines.append("cylinder.name = 'Generated_Cylinder'")
-        else:
-            # Default to cube for generic mesh requests
-            code_lines.append("bpy.ops.mesh.primitive_cube_add(size=2, location=(0, 0, 0))")
-            code_lines.append("obj = bpy.context.active_object")
-            code_lines.append("obj.name = 'Generated_Object'")
+        # Primitives named in the prompt, in order, each repeated by its count
+        kinds = []
+        for count, kind in _PRIMITIVE_RE.findall(prompt_lower):
+            kinds.extend([kind] * min(int(count or 1), MAX_BATCH_PRIMITIVES))
+        del kinds[MAX_BATCH_PRIMITIVES:]
         
         # Add modifiers based on prompt
-        if 'smooth' in prompt.lower():
-            code_lines.append("modifier = obj.modifiers.new(name='Smooth', type='SUBSURF')")
-            code_lines.append("modifier.levels = 2")
-        
-        if 'bevel' in prompt.lower():
-            code_lines.append("bevel = obj.modifiers.new(name='Bevel', type='BEVEL')")
-            code_lines.append("bevel.width = 0.1")
+        smooth = _MESH_SMOOTH if 'smooth' in tokens else ''
+        bevel = _MESH_BEVEL if 'bevel' in tokens else ''
+        
+        generator = get_mesh_generator()
+        if len(kinds) > 1:
+            # One script for the whole row; the new objects are the selected
+            # ones afterwards, so the modifiers go on each of them
+            code = generator.generate_batch([
+                (kind, {'location': (i * BATCH_SPACING, 0, 0)}) for i, kind in enumerate(kinds)
+            ])
+            modifiers = f"{smooth}{bevel}"
+            if modifiers:
+                code += "\nfor obj in bpy.context.selected_objects:" + modifiers.replace("\n", "\n    ")
+            return code
+        if kinds:
+            base = generator.generate_mesh(kinds[0])
+        else:
+            # Default to cube for generic mesh requests
+            base = generator.generate_mesh('cube', name='Generated_Object')
         
-        return "\n".join(code_lines)
+        return f"{base}{smooth}{bevel}"
     
-    def _handle_material_generation(self, prompt: str) -> str:
+    def _handle_material_generation(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for material creation"""
-        code_lines = []
-        
-        # Create material
-        code_lines.append("material = bpy.data.materials.new(name='Generated_Material')")
-        code_lines.append("material.use_nodes = True")
-        code_lines.append("nodes = material.node_tree.nodes")
-        code_lines.append("links = material.node_tree.links")
-        
-        # Clear default nodes
-        code_lines.append("nodes.clear()")
-        
-        # Add principled BSDF
-        code_lines.append("principled = nodes.new(type='ShaderNodeBsdfPrincipled')")
-        code_lines.append("output = nodes.new(type='ShaderNodeOutputMaterial')")
-        code_lines.append("links.new(principled.outputs['BSDF'], output.inputs['Surface'])")
+        if tokens is None:
+            tokens = _tokenize(prompt_lower if prompt_lower is not None else prompt.lower())
         
         # Set material properties based on prompt
-        if 'metal' in prompt.lower():
-            code_lines.append("principled.inputs['Metallic'].default_value = 1.0")
-            code_lines.append("principled.inputs['Roughness'].default_value = 0.1")
-        elif 'plastic' in prompt.lower():
-            code_lines.append("principled.inputs['Metallic'].default_value = 0.0")
-            code_lines.append("principled.inputs['Roughness'].default_value = 0.3")
-        elif 'glass' in prompt.lower():
-            code_lines.append("principled.inputs['Transmission'].default_value = 1.0")
-            code_lines.append("principled.inputs['IOR'].default_value = 1.45")
+        if 'metal' in tokens or 'metallic' in tokens:
+            finish = _MATERIAL_METAL
+        elif 'plastic' in tokens:
+            finish = _MATERIAL_PLASTIC
+        elif 'glass' in tokens:
+            finish = _MATERIAL_GLASS
+        else:
+            finish = ''
         
         # Set color if specified
-        if 'red' in prompt.lower():
-            code_lines.append("principled.inputs['Base Color'].default_value = (1, 0, 0, 1)")
-        elif 'blue' in prompt.lower():
-            code_lines.append("principled.inputs['Base Color'].default_value = (0, 0, 1, 1)")
-        elif 'green' in prompt.lower():
-            code_lines.append("principled.inputs['Base Color'].default_value = (0, 1, 0, 1)")
-        
-        # Apply to selected objects
-        code_lines.append("for obj in bpy.context.selected_objects:")
-        code_lines.append("    if obj.type == 'MESH':")
-        code_lines.append("        if obj.data.materials:")
-        code_lines.append("            obj.data.materials[0] = material")
-        code_lines.append("        else:")
-        code_lines.append("            obj.data.materials.append(material)")
+        if 'red' in tokens:
+            color = _MATERIAL_RED
+        elif 'blue' in tokens:
+            color = _MATERIAL_BLUE
+        elif 'green' in tokens:
+            color = _MATERIAL_GREEN
+        else:
+            color = ''
         
-        return "\n".join(code_lines)
+        return f"{_MATERIAL_HEADER}{finish}{color}\n{_MATERIAL_APPLY}"
     
-    def _handle_scene_layout(self, prompt: str) -> str:
+    def _handle_scene_layout(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for scene layout"""
-        code_lines = []
-        
-        # Create a collection for organized layout
-        code_lines.append("layout_collection = bpy.data.collections.new('Layout_Collection')")
-        code_lines.append("bpy.context.scene.collection.children.link(layout_collection)")
-        
-        # Add camera if not exists
-        code_lines.append("if not bpy.data.cameras:")
-        code_lines.append("    bpy.ops.object.camera_add(location=(5, -5, 3))")
-        code_lines.append("    camera = bpy.context.active_object")
-        code_lines.append("    camera.rotation_euler = (1.1, 0, 0.785)")
-        code_lines.append("    bpy.context.scene.camera = camera")
-        
-        # Add lighting if not exists
-        code_lines.append("if not bpy.data.lights:")
-        code_lines.append("    bpy.ops.object.light_add(type='SUN', location=(5, 5, 10))")
-        code_lines.append("    sun = bpy.context.active_object")
-        code_lines.append("    sun.data.energy = 5.0")
-        
-        # Arrange objects in a grid if multiple objects
-        code_lines.append("objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']")
-        code_lines.append("for i, obj in enumerate(objects):")
-        code_lines.append("    row = i // 3")
-        code_lines.append("    col = i % 3")
-        code_lines.append("    obj.location = (col * 3, row * 3, 0)")
-        
-        return "\n".join(code_lines)
+        return _SCENE_LAYOUT
     
-    def _handle_camera_setup(self, prompt: str) -> str:
+    def _handle_camera_setup(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for camera setup"""
-        code_lines = []
-        
-        # Create or modify camera
-        code_lines.append("if not bpy.data.cameras:")
-        code_lines.append("    bpy.ops.object.camera_add()")
-        code_lines.append("camera = bpy.context.active_object")
-        code_lines.append("bpy.context.scene.camera = camera")
+        if tokens is None:
+            tokens = _tokenize(prompt_lower if prompt_lower is not None else prompt.lower())
         
         # Set camera properties based on prompt
-        if 'close' in prompt.lower():
-            code_lines.append("camera.location = (2, -2, 1.5)")
-        elif 'far' in prompt.lower():
-            code_lines.append("camera.location = (10, -10, 5)")
+        if 'close' in tokens:
+            location = _CAMERA_CLOSE
+        elif 'far' in tokens:
+            location = _CAMERA_FAR
         else:
-            code_lines.append("camera.location = (5, -5, 3)")
+            location = _CAMERA_DEFAULT
         
-        # Set camera rotation to look at origin
-        code_lines.append("camera.rotation_euler = (1.1, 0, 0.785)")
-        
-        return "\n".join(code_lines)
+        return f"{_CAMERA_HEADER}\n{location}\n{_CAMERA_ROTATION}"
     
-    def _handle_lighting_setup(self, prompt: str) -> str:
+    def _handle_lighting_setup(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for lighting setup"""
-        code_lines = []
-        
-        # Clear existing lights
-        code_lines.append("for obj in bpy.context.scene.objects:")
-        code_lines.append("    if obj.type == 'LIGHT':")
-        code_lines.append("        bpy.data.objects.remove(obj, do_unlink=True)")
+        if tokens is None:
+            tokens = _tokenize(prompt_lower if prompt_lower is not None else prompt.lower())
         
         # Add lighting based on prompt
-        if 'studio' in prompt.lower():
-            # Studio lighting setup
-            code_lines.append("bpy.ops.object.light_add(type='AREA', location=(3, 0, 2))")
-            code_lines.append("key_light = bpy.context.active_object")
-            code_lines.append("key_light.data.energy = 1000")
-            code_lines.append("key_light.data.size = 2")
-            
-            code_lines.append("bpy.ops.object.light_add(type='AREA', location=(-3, 0, 2))")
-            code_lines.append("fill_light = bpy.context.active_object")
-            code_lines.append("fill_light.data.energy = 500")
-            code_lines.append("fill_light.data.size = 2")
-            
-        elif 'dramatic' in prompt.lower():
-            # Dramatic lighting
-            code_lines.append("bpy.ops.object.light_add(type='SPOT', location=(0, 0, 5))")
-            code_lines.append("spot = bpy.context.active_object")
-            code_lines.append("spot.data.energy = 2000")
-            code_lines.append("spot.data.spot_size = 0.5")
-            
+        if 'studio' in tokens:
+            lights = _LIGHTING_STUDIO
+        elif 'dramatic' in tokens:
+            lights = _LIGHTING_DRAMATIC
         else:
-            # Default sun lighting
-            code_lines.append("bpy.ops.object.light_add(type='SUN', location=(5, 5, 10))")
-            code_lines.append("sun = bpy.context.active_object")
-            code_lines.append("sun.data.energy = 5.0")
+            lights = _LIGHTING_DEFAULT
         
-        return "\n".join(code_lines)
+        return f"{_LIGHTING_CLEAR}\n{lights}"
     
-    def _handle_animation(self, prompt: str) -> str:
+    def _handle_animation(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for animation"""
-        code_lines = []
-        
-        # Set up animation
-        code_lines.append("bpy.context.scene.frame_start = 1")
-        code_lines.append("bpy.context.scene.frame_end = 120")
-        
-        # Animate selected objects
-        code_lines.append("for obj in bpy.context.selected_objects:")
-        code_lines.append("    if obj.type == 'MESH':")
-        code_lines.append("        obj.keyframe_insert(data_path='location', frame=1)")
-        code_lines.append("        obj.location.z += 2")
-        code_lines.append("        obj.keyframe_insert(data_path='location', frame=60)")
-        code_lines.append("        obj.location.z -= 2")
-        code_lines.append("        obj.keyframe_insert(data_path='location', frame=120)")
-        
-        return "\n".join(code_lines)
+        return _ANIMATION
     
-    def _handle_export(self, prompt: str) -> str:
+    def _handle_export(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Generate Blender code for export operations"""
-        code_lines = []
-        
-        # Set up export path
-        code_lines.append("import os")
-        code_lines.append("blend_path = bpy.data.filepath")
-        code_lines.append("if blend_path:")
-        code_lines.append("    export_dir = os.path.join(os.path.dirname(blend_path), 'exports')")
-        code_lines.append("    os.makedirs(export_dir, exist_ok=True)")
-        code_lines.append("    fbx_path = os.path.join(export_dir, 'scene.fbx')")
-        code_lines.append("    bpy.ops.export_scene.fbx(filepath=fbx_path)")
-        
-        return "\n".join(code_lines)
+        return _EXPORT
     
-    def _handle_utility(self, prompt: str) -> str:
+    def _handle_utility(self, prompt: str, prompt_lower: Optional[str] = None, tokens: Optional[frozenset] = None) -> str:
         """Handle utility operations"""
-        code_lines = []
-        
-        # Default utility operations
-        code_lines.append("# Utility operation")
-        code_lines.append("print('ForgeCore AI: Processing utility request')")
-        
-        if 'clear' in prompt.lower():
-            code_lines.append("bpy.ops.object.select_all(action='SELECT')")
-            code_lines.append("bpy.ops.object.delete(use_global=False)")
-        elif 'select' in prompt.lower():
-            code_lines.append("bpy.ops.object.select_all(action='SELECT')")
-        elif 'deselect' in prompt.lower():
-            code_lines.append("bpy.ops.object.select_all(action='DESELECT')")
-        
-        return "\n".join(code_lines)
+        if tokens is None:
+            tokens = _tokenize(prompt_lower if prompt_lower is not None else prompt.lower())
+        
+        if 'clear' in tokens:
+            return f"{_UTILITY_HEADER}\n{_UTILITY_CLEAR}"
+        elif 'select' in tokens:
+            return f"{_UTILITY_HEADER}\n{_UTILITY_SELECT}"
+        elif 'deselect' in tokens:
+            return f"{_UTILITY_HEADER}\n{_UTILITY_DESELECT}"
+        return _UTILITY_HEADER
+
+    # Category name -> handler function, shared by all instances and called
+    # with the router passed explicitly
+    handlers = {
+        'mesh': _handle_mesh_generation,
+        'material': _handle_material_generation,
+        'layout': _handle_scene_layout,
+        'camera': _handle_camera_setup,
+        'lighting': _handle_lighting_setup,
+        'animation': _handle_animation,
+        'export': _handle_export,
+        'utility': _handle_utility,
+        'knowledge': _handle_knowledge_query,
+        'tool': _handle_tool,
+        'procedural': _handle_procedural,
+        'scene_analysis': _handle_scene_analysis
+    }
+
+# Handlers whose output depends only on the lowercased prompt
+_PURE_HANDLERS = {
+    name: PromptRouter.handlers[name]
+    for name in ('mesh', 'material', 'layout', 'camera', 'lighting',
+                 'animation', 'export', 'utility', 'procedural')
+}
+
+ROUTE_CACHE_SIZE = 512
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def _route_core(prompt_lower: str) -> tuple:
+    """Classify a single-task prompt and memoize the code of pure handlers.
+    Returns (category, code), with code None for stateful categories."""
+    tokens = _tokenize(prompt_lower)
+    category = _classify(prompt_lower, tokens)
+    handler = _PURE_HANDLERS.get(category)
+    if handler is None:
+        return category, None
+    # Pure handlers never touch the router instance
+    return category, handler(None, prompt_lower, prompt_lower, tokens)
 
 class AgentCore:
     """Main agent core for ForgeCore AI"""
+    __slots__ = ('router', 'memory', 'sub_agent_results', 'history', 'activity_token')
     
     def __init__(self):
         self.router = PromptRouter()
         self.memory = self._load_memory()
-        self.sub_agents = {}  # Track sub-agents by UUID
         self.sub_agent_results = []
         self.history = self.memory.get('history', [])
+        # Replaced whenever history or sub_agent_results is replaced rather
+        # than appended to, so the panel knows to rebuild its lists
+        self.activity_token = uuid.uuid4().hex
     
     def _load_memory(self):
         """Load persistent memory/history from file."""
@@ -471,9 +728,14 @@ class AgentCore:
         if os.path.exists(mem_path):
             try:
                 with open(mem_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    memory = json_utils.load(f)
             except Exception:
                 return {}
+            # Prompts/results belong to the bridge's append-only log; never
+            # write a stale copy of them back into the store
+            memory.pop('prompts', None)
+            memory.pop('results', None)
+            return memory
         return {}
 
     def _save_memory(self):
@@ -481,81 +743,68 @@ class AgentCore:
         mem_path = os.path.join(os.path.dirname(__file__), 'memory', 'memory_store.json')
         try:
             with open(mem_path, 'w', encoding='utf-8') as f:
-                json.dump(self.memory, f, indent=2)
+                json_utils.dump(self.memory, f)
         except Exception:
             pass
 
     def handle_prompt(self, prompt: str) -> str:
         """Main entry point for handling prompts. Supports multi-agent orchestration."""
         try:
-            self._log_prompt(prompt)
             router_result = self.router.route_prompt(prompt)
-            # Check for multi-step marker
-            if isinstance(router_result, str):
-                try:
-                    router_result_json = json.loads(router_result)
-                except Exception:
-                    router_result_json = None
-            else:
-                router_result_json = None
-            if router_result_json and router_result_json.get('multi_step'):
+            if isinstance(router_result, list):
                 # Multi-agent orchestration
-                subtasks = router_result_json['subtasks']
+                subtasks = router_result
                 self.sub_agent_results = []
-                for subtask in subtasks:
-                    sub_agent_id = str(uuid.uuid4())
-                    sub_agent = AgentCore()
-                    self.sub_agents[sub_agent_id] = sub_agent
-                    result = sub_agent.handle_prompt(subtask)
-                    self.sub_agent_results.append({'id': sub_agent_id, 'prompt': subtask, 'result': result})
+                self.activity_token = uuid.uuid4().hex
+                # Tool subtasks block on network/disk, so run them on the pool
+                # while the pure string-building subtasks run inline
+                pending = {
+                    i: _get_subtask_pool().submit(self._run_subtask, subtask)
+                    for i, subtask in enumerate(subtasks)
+                    if _classify_prompt(subtask) == 'tool'
+                }
+                for i, subtask in enumerate(subtasks):
+                    result = pending[i].result() if i in pending else self._run_subtask(subtask)
+                    self.sub_agent_results.append({
+                        'id': str(uuid.uuid4()), 'prompt': subtask, 'result': result,
+                        'short_result': shorten_result(result)
+                    })
                 # Aggregate all results into a single script
-                all_code = '\n\n'.join([r['result'] for r in self.sub_agent_results])
-                self._log_result(prompt, all_code)
-                return all_code
+                return '\n\n'.join([r['result'] for r in self.sub_agent_results])
             
-            blender_code = router_result if isinstance(router_result, str) else str(router_result)
-            safe_code = self._wrap_code_safely(blender_code)
-            self._log_result(prompt, safe_code)
-            return safe_code
+            return self._wrap_code_safely(router_result)
             
         except Exception as e:
-            error_code = f"# Error processing prompt: {str(e)}\nprint('ForgeCore AI: Error occurred')"
-            self._log_result(prompt, error_code)
-            return error_code
+            return f"# Error processing prompt: {str(e)}\nprint('ForgeCore AI: Error occurred')"
+    
+    def _run_subtask(self, subtask: str) -> str:
+        """Handle one subtask of a multi-step prompt with the shared router"""
+        try:
+            return self._wrap_code_safely(self.router.route_prompt(subtask))
+        except Exception as e:
+            return f"# Error processing prompt: {str(e)}\nprint('ForgeCore AI: Error occurred')"
     
     def _wrap_code_safely(self, code: str) -> str:
         """Wrap code in safety checks"""
-        safe_wrapper = [
-            "# ForgeCore AI Generated Code",
-            "try:",
-            "    " + "\n    ".join(code.split("\n")),
-            "    print('ForgeCore AI: Code executed successfully')",
-            "except Exception as e:",
+        # Indent every line into the try block in a single C-level pass;
+        # textwrap.indent splits and rejoins lines in Python, so it is slower
+        body = code.replace("\n", "\n    ")
+        return (
+            "# ForgeCore AI Generated Code\n"
+            "try:\n"
+            f"    {body}\n"
+            "    print('ForgeCore AI: Code executed successfully')\n"
+            "except Exception as e:\n"
             "    print(f'ForgeCore AI: Error executing code: {e}')"
-        ]
-        return "\n".join(safe_wrapper)
+        )
     
-    def _log_prompt(self, prompt: str):
-        """Log a prompt to memory"""
-        timestamp = datetime.now().isoformat()
-        if 'prompts' not in self.memory:
-            self.memory['prompts'] = []
-        self.memory['prompts'].append({
-            'timestamp': timestamp,
-            'prompt': prompt
-        })
+    def clear_history(self):
+        """Forget the prompt history, in memory and on disk"""
+        self.memory['history'] = []
+        self.history = []
+        self.activity_token = uuid.uuid4().hex
+        self._save_memory()
     
-    def _log_result(self, prompt: str, result: str):
-        """Log a result to memory"""
-        timestamp = datetime.now().isoformat()
-        if 'results' not in self.memory:
-            self.memory['results'] = []
-        self.memory['results'].append({
-            'timestamp': timestamp,
-            'prompt': prompt,
-            'result': result
-        })
-
     def get_sub_agent_activity(self):
         """Return a summary of sub-agent activity/results."""
         return self.sub_agent_results
@@ -563,8 +812,67 @@ class AgentCore:
     def get_history(self):
         return self.history
 
+# Characters of a result shown in one UI label
+RESULT_PREVIEW_CHARS = 60
+
+def shorten_result(result: str) -> str:
+    """Truncate a result for display, marking the cut with an ellipsis"""
+    if len(result) <= RESULT_PREVIEW_CHARS:
+        return result
+    return result[:RESULT_PREVIEW_CHARS] + "..."
+
 # Global instance
 _agent_core = None
+_subtask_pool = None
+_http_session = None
+_file_pool = None
+# Guards lazy creation of the shared pools and HTTP session, which subtask
+# worker threads may request at the same time
+_LAZY_INIT_LOCK = threading.Lock()
+
+# Worker threads for I/O-bound subtasks of multi-step prompts
+SUBTASK_WORKERS = 4
+
+def _get_subtask_pool() -> ThreadPoolExecutor:
+    """Get the shared subtask thread pool, creating it on first use"""
+    global _subtask_pool
+    if _subtask_pool is None:
+        with _LAZY_INIT_LOCK:
+            if _subtask_pool is None:
+                _subtask_pool = ThreadPoolExecutor(max_workers=SUBTASK_WORKERS, thread_name_prefix='forgecore_subtask')
+    return _subtask_pool
+
+# Worker threads for batched file deletions
+FILE_OP_WORKERS = 16
+
+def _get_file_pool() -> ThreadPoolExecutor:
+    """Get the shared file operation thread pool, creating it on first use"""
+    global _file_pool
+    if _file_pool is None:
+        with _LAZY_INIT_LOCK:
+            if _file_pool is None:
+                _file_pool = ThreadPoolExecutor(max_workers=FILE_OP_WORKERS, thread_name_prefix='forgecore_fileop')
+    return _file_pool
+
+# Seconds a "run python" tool request may run before its process is killed
+CODE_EXEC_TIMEOUT = 3
+
+# Seconds to wait for a web search response
+WEB_SEARCH_TIMEOUT = 5
+
+def _get_http_session() -> 'requests.Session':
+    """Get the shared keep-alive HTTP session used for web searches"""
+    global _http_session
+    if _http_session is None:
+        with _LAZY_INIT_LOCK:
+            if _http_session is None:
+                # requests is slow to import, so load it on the first web search
+                import requests
+                session = requests.Session()
+                session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=SUBTASK_WORKERS))
+                # Publish only once mounted, so no thread sees it half set up
+                _http_session = session
+    return _http_session
 
 def get_agent_core() -> AgentCore:
     """Get the global agent core instance"""
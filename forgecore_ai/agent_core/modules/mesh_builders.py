@@ -0,0 +1,233 @@
+"""
+Mesh Builders Module - ForgeCore AI
+Runtime primitive builders that generated scripts call inside Blender
+"""
+
+import bmesh
+import bpy
+import numpy as np
+from mathutils import Matrix
+from types import MappingProxyType
+from typing import Optional
+
+# Geometry builders. Each returns `co` (N x 3 vertex positions),
+# `vertex_index` (all face corners, face after face), `loop_total`
+# (corner count of each face) and `uv` (a UV coordinate per face corner)
+# as NumPy arrays
+
+def _uv(u, v):
+    """Stack broadcast u and v coordinates into (..., 2) UV pairs"""
+    return np.stack(np.broadcast_arrays(u, v), axis=-1)
+
+# Box corners are indexed 4*x + 2*y + z with each axis 0 (low) or 1 (high)
+_BOX_FACES = np.array([(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)])
+# Each box face and the plane cover the whole UV square
+_QUAD_UV = np.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+
+def _box_arrays(size):
+    h = size / 2
+    co = np.array([(x, y, z) for x in (-h, h) for y in (-h, h) for z in (-h, h)])
+    return co, _BOX_FACES.ravel(), np.full(len(_BOX_FACES), 4), np.tile(_QUAD_UV, (len(_BOX_FACES), 1))
+
+def _plane_arrays(size):
+    h = size / 2
+    co = np.array([(-h, -h, 0.0), (h, -h, 0.0), (h, h, 0.0), (-h, h, 0.0)])
+    return co, np.arange(4), np.array([4]), _QUAD_UV
+
+def _sphere_arrays(radius, segments, rings):
+    """Poles plus rings-1 latitude circles; triangle fans at the poles, quads between.
+    UVs are equirectangular, with the seam at the first segment."""
+    theta = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    phi = np.linspace(-np.pi / 2, np.pi / 2, rings + 1)[1:-1, None]
+    ring_co = np.stack(np.broadcast_arrays(np.cos(phi) * np.cos(theta), np.cos(phi) * np.sin(theta), np.sin(phi)), axis=-1)
+    co = np.vstack([[0.0, 0.0, -1.0], ring_co.reshape(-1, 3), [0.0, 0.0, 1.0]]) * radius
+    j = np.arange(segments)
+    k = (j + 1) % segments
+    top = len(co) - 1
+    base = 1 + segments * np.arange(rings - 2)[:, None]
+    vertex_index = np.concatenate([
+        np.stack([np.zeros_like(j), 1 + k, 1 + j], axis=1).ravel(),
+        np.stack([base + j, base + k, base + k + segments, base + j + segments], axis=-1).ravel(),
+        np.stack([top - segments + j, top - segments + k, np.full_like(j, top)], axis=1).ravel(),
+    ])
+    loop_total = np.concatenate([np.full(segments, 3), np.full(segments * (rings - 2), 4), np.full(segments, 3)])
+    # k wraps to 0 at the seam, so its u runs on to 1 instead
+    u_j, u_k, u_mid = j / segments, (j + 1) / segments, (j + 0.5) / segments
+    v_low = np.arange(1, rings - 1)[:, None] / rings
+    v_high = v_low + 1 / rings
+    uv = np.concatenate([
+        np.stack([_uv(u_mid, 0.0), _uv(u_k, 1 / rings), _uv(u_j, 1 / rings)], axis=1).reshape(-1, 2),
+        np.stack([_uv(u_j, v_low), _uv(u_k, v_low), _uv(u_k, v_high), _uv(u_j, v_high)], axis=-2).reshape(-1, 2),
+        np.stack([_uv(u_j, 1 - 1 / rings), _uv(u_k, 1 - 1 / rings), _uv(u_mid, 1.0)], axis=1).reshape(-1, 2),
+    ])
+    return co, vertex_index, loop_total, uv
+
+def _frustum_arrays(radius1, radius2, depth, vertices):
+    """Circles at -depth/2 and +depth/2 joined by quads; a zero radius becomes an apex.
+    The sides unroll into the top half of UV space and each cap is a circle
+    in one quarter of the bottom half."""
+    if not radius1:
+        # Apex at the bottom: the apex-top cone turned half a turn about X,
+        # which keeps the faces pointing outwards
+        co, vertex_index, loop_total, uv = _frustum_arrays(radius2, 0.0, depth, vertices)
+        co[:, 1:] *= -1
+        return co, vertex_index, loop_total, uv
+    theta = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    circle = np.column_stack([np.cos(theta), np.sin(theta)])
+    bottom = np.arange(vertices)
+    u_j, u_k = bottom / vertices, (bottom + 1) / vertices
+    # Mirrored, as the bottom cap is seen from below
+    bottom_cap_uv = (circle * (-0.25, 0.25) + 0.25)[::-1]
+    if not radius2:
+        co = np.vstack([np.column_stack([circle * radius1, np.full(vertices, -depth / 2)]), [[0.0, 0.0, depth / 2]]])
+        sides = np.stack([bottom, np.roll(bottom, -1), np.full(vertices, vertices)], axis=1)
+        sides_uv = np.stack([_uv(u_j, 0.5), _uv(u_k, 0.5), _uv((bottom + 0.5) / vertices, 1.0)], axis=1)
+        return (co, np.concatenate([sides.ravel(), bottom[::-1]]), np.array([3] * vertices + [vertices]),
+                np.concatenate([sides_uv.reshape(-1, 2), bottom_cap_uv]))
+    co = np.vstack([
+        np.column_stack([circle * radius1, np.full(vertices, -depth / 2)]),
+        np.column_stack([circle * radius2, np.full(vertices, depth / 2)]),
+    ])
+    top = bottom + vertices
+    sides = np.stack([bottom, np.roll(bottom, -1), np.roll(top, -1), top], axis=1)
+    sides_uv = np.stack([_uv(u_j, 0.5), _uv(u_k, 0.5), _uv(u_k, 1.0), _uv(u_j, 1.0)], axis=1)
+    return (co, np.concatenate([sides.ravel(), bottom[::-1], top]), np.array([4] * vertices + [vertices] * 2),
+            np.concatenate([sides_uv.reshape(-1, 2), bottom_cap_uv, circle * 0.25 + (0.75, 0.25)]))
+
+def _torus_arrays(major_radius, minor_radius, major_segments, minor_segments):
+    a = np.linspace(0, 2 * np.pi, major_segments, endpoint=False)[:, None]
+    b = np.linspace(0, 2 * np.pi, minor_segments, endpoint=False)[None, :]
+    r = major_radius + minor_radius * np.cos(b)
+    co = np.stack(np.broadcast_arrays(r * np.cos(a), r * np.sin(a), minor_radius * np.sin(b)), axis=-1).reshape(-1, 3)
+    i = np.arange(major_segments)[:, None] * minor_segments
+    i1 = np.roll(i, -1, axis=0)
+    j = np.arange(minor_segments)[None, :]
+    j1 = (j + 1) % minor_segments
+    vertex_index = np.stack(np.broadcast_arrays(i + j, i1 + j, i1 + j1, i + j1), axis=-1).ravel()
+    # u follows the major ring and v the minor one, each running on to 1 at its seam
+    u0 = np.arange(major_segments)[:, None] / major_segments
+    u1 = u0 + 1 / major_segments
+    v0 = j / minor_segments
+    v1 = v0 + 1 / minor_segments
+    uv = np.stack([_uv(u0, v0), _uv(u1, v0), _uv(u1, v1), _uv(u0, v1)], axis=-2).reshape(-1, 2)
+    return co, vertex_index, np.full(major_segments * minor_segments, 4), uv
+
+def _fill_mesh(mesh, co, vertex_index, loop_total, uv):
+    """Fill an empty mesh datablock straight from geometry arrays, with a UV
+    map as the primitive_*_add operators create by default"""
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set('co', co.astype(np.float32).ravel())
+    mesh.loops.add(len(vertex_index))
+    mesh.loops.foreach_set('vertex_index', vertex_index.astype(np.int32))
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set('loop_start', (np.cumsum(loop_total) - loop_total).astype(np.int32))
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set('loop_total', loop_total.astype(np.int32))
+    mesh.uv_layers.new(name="UVMap").data.foreach_set('uv', uv.astype(np.float32).ravel())
+    mesh.update(calc_edges=True)
+
+def _fill_ico_sphere(mesh, subdivisions):
+    # Subdividing an icosahedron has no simple array form, so bmesh builds it;
+    # calc_uvs writes into the active UV layer, which has to exist first
+    bm = bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, radius=1.0, calc_uvs=True)
+    bm.to_mesh(mesh)
+    bm.free()
+
+def _primitive_mesh(kind: str, shape: tuple, fill, scale: float, depth_scale: Optional[float] = None):
+    """New mesh for a primitive, copied from a unit-size template built with
+    `fill(mesh, *shape)` the first time and scaled to size. Only the shape
+    parameters key the template, so primitives of any size share it."""
+    name = "ForgeCore_" + "_".join(map(str, (kind,) + shape))
+    template = bpy.data.meshes.get(name)
+    if template is None:
+        # Templates are never linked to an object, so they are not saved
+        # with the file and are rebuilt on first use after reloading
+        template = bpy.data.meshes.new(name)
+        fill(template, *shape)
+    # Each object gets its own copy, so materials and edits stay per object
+    mesh = template.copy()
+    if depth_scale is None:
+        depth_scale = scale
+    if scale != 1 or depth_scale != 1:
+        mesh.transform(Matrix.Diagonal((scale, scale, depth_scale, 1.0)))
+    return mesh
+
+# Fills for the unit-size templates, called as fill(mesh, *shape)
+
+def _fill_box(mesh):
+    _fill_mesh(mesh, *_box_arrays(1.0))
+
+def _fill_plane(mesh):
+    _fill_mesh(mesh, *_plane_arrays(1.0))
+
+def _fill_uv_sphere(mesh, segments, rings):
+    _fill_mesh(mesh, *_sphere_arrays(1.0, segments, rings))
+
+def _fill_frustum(mesh, radius1, radius2, vertices):
+    # Unit depth, with the larger radius 1
+    _fill_mesh(mesh, *_frustum_arrays(radius1, radius2, 1.0, vertices))
+
+def _fill_torus(mesh, minor_radius, major_segments, minor_segments):
+    _fill_mesh(mesh, *_torus_arrays(1.0, minor_radius, major_segments, minor_segments))
+
+def _link_object(mesh, name: str, location):
+    """Link a new object for `mesh` into the active collection as the active,
+    selected object, which is what the primitive_*_add operators leave behind"""
+    mesh.name = name
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    bpy.context.collection.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    return obj
+
+def deselect_all():
+    """Deselect every object in the view layer. The primitive_*_add operators
+    did this for each object; generated scripts call it once up front."""
+    for obj in list(bpy.context.view_layer.objects.selected):
+        obj.select_set(False)
+
+# Builders called by generated scripts in place of bpy.ops.mesh.primitive_*_add;
+# they create objects straight in bpy.data, bypassing the operator stack
+
+def make_cube(size=2.0, location=(0, 0, 0), name="Cube"):
+    return _link_object(_primitive_mesh('cube', (), _fill_box, size), name, location)
+
+def make_plane(size=2.0, location=(0, 0, 0), name="Plane"):
+    return _link_object(_primitive_mesh('plane', (), _fill_plane, size), name, location)
+
+def make_uv_sphere(radius=1.0, location=(0, 0, 0), name="Sphere", segments=32, rings=16):
+    mesh = _primitive_mesh('uv_sphere', (segments, rings), _fill_uv_sphere, radius)
+    return _link_object(mesh, name, location)
+
+def make_ico_sphere(radius=1.0, location=(0, 0, 0), name="Icosphere", subdivisions=2):
+    mesh = _primitive_mesh('ico_sphere', (subdivisions,), _fill_ico_sphere, radius)
+    return _link_object(mesh, name, location)
+
+def make_cylinder(radius=1.0, depth=2.0, location=(0, 0, 0), name="Cylinder", vertices=32):
+    return make_cone(radius, radius, depth, location, name, vertices)
+
+def make_cone(radius1=1.0, radius2=0.0, depth=2.0, location=(0, 0, 0), name="Cone", vertices=32):
+    # The template keeps the ratio of the radii; the larger one sets the scale
+    scale = max(radius1, radius2) or 1.0
+    shape = (radius1 / scale, radius2 / scale, vertices)
+    return _link_object(_primitive_mesh('cone', shape, _fill_frustum, scale, depth), name, location)
+
+def make_torus(major_radius=1.0, minor_radius=0.25, location=(0, 0, 0), name="Torus",
+               major_segments=48, minor_segments=12):
+    shape = (minor_radius / major_radius, major_segments, minor_segments)
+    return _link_object(_primitive_mesh('torus', shape, _fill_torus, major_radius), name, location)
+
+# Globals the run-prompt operator execs generated scripts with
+SCRIPT_HELPERS = MappingProxyType({
+    '_forgecore_deselect_all': deselect_all,
+    '_forgecore_make_cube': make_cube,
+    '_forgecore_make_plane': make_plane,
+    '_forgecore_make_uv_sphere': make_uv_sphere,
+    '_forgecore_make_ico_sphere': make_ico_sphere,
+    '_forgecore_make_cylinder': make_cylinder,
+    '_forgecore_make_cone': make_cone,
+    '_forgecore_make_torus': make_torus,
+})
@@ -1,13 +1,59 @@
 import bpy
+from bpy.app.handlers import persistent
 from bpy.types import Operator
 import os
 
+# FBX settings shared by every engine target; use_mesh_modifiers is
+# decided per export from the scene
+FBX_COMMON_SETTINGS = {
+    'use_selection': False,
+    'use_active_collection': False,
+    'apply_unit_scale': True,
+    'apply_scale_options': 'FBX_SCALE_ALL',
+    'object_types': {'MESH', 'ARMATURE', 'EMPTY', 'CAMERA', 'LIGHT'},
+    'mesh_smooth_type': 'OFF',
+    'use_tspace': True,
+    'use_custom_props': True,
+    'add_leaf_bones': False,
+    'primary_bone_axis': 'Y',
+    'secondary_bone_axis': 'X',
+    'use_armature_deform_only': False,
+    'bake_anim': True,
+    'bake_anim_use_all_bones': True,
+    'bake_anim_use_nla_strips': True,
+    'bake_anim_use_all_actions': True,
+    'bake_anim_force_startend_keying': True,
+    'bake_anim_step': 1.0,
+    'bake_anim_simplify_factor': 1.0,
+    'path_mode': 'AUTO',
+    'embed_textures': False,
+    'batch_mode': 'OFF',
+    'use_metadata': True,
+}
+
+# Export file name and engine-specific overrides
+FBX_TARGETS = (
+    ("scene_unity.fbx", {'global_scale': 1.0, 'bake_space_transform': False}),
+    # Unreal uses cm, Blender uses m
+    ("scene_unreal.fbx", {'global_scale': 100.0, 'bake_space_transform': True}),
+)
+
+# Set by any depsgraph update or file load; cleared after a full export
+_scene_dirty = True
+
+@persistent
+def _mark_scene_dirty(*args):
+    """Handler that flags the exported files as out of date"""
+    global _scene_dirty
+    _scene_dirty = True
+
 class FORGECORE_OT_export_scene(Operator):
     bl_idname = "forgecore.export_scene"
     bl_label = "Export Scene"
     bl_description = "Export scene to Unity/Unreal ready formats"
     
     def execute(self, context):
+        global _scene_dirty
         try:
             # Get the filepath
             blend_filepath = bpy.data.filepath
@@ -20,73 +66,40 @@ class FORGECORE_OT_export_scene(Operator):
             export_dir = os.path.join(blend_dir, "exports")
             os.makedirs(export_dir, exist_ok=True)
             
-            # Export as FBX for Unity
-            fbx_path = os.path.join(export_dir, "scene_unity.fbx")
-            bpy.ops.export_scene.fbx(
-                filepath=fbx_path,
-                use_selection=False,
-                use_active_collection=False,
-                global_scale=1.0,
-                apply_unit_scale=True,
-                apply_scale_options='FBX_SCALE_ALL',
-                bake_space_transform=False,
-                object_types={'MESH', 'ARMATURE', 'EMPTY', 'CAMERA', 'LIGHT'},
-                use_mesh_modifiers=True,
-                mesh_smooth_type='OFF',
-                use_tspace=True,
-                use_custom_props=True,
-                add_leaf_bones=False,
-                primary_bone_axis='Y',
-                secondary_bone_axis='X',
-                use_armature_deform_only=False,
-                bake_anim=True,
-                bake_anim_use_all_bones=True,
-                bake_anim_use_nla_strips=True,
-                bake_anim_use_all_actions=True,
-                bake_anim_force_startend_keying=True,
-                bake_anim_step=1.0,
-                bake_anim_simplify_factor=1.0,
-                path_mode='AUTO',
-                embed_textures=False,
-                batch_mode='OFF',
-                use_metadata=True
-            )
+            # Each FBX export re-evaluates and re-bakes the whole scene, so
+            # skip it when nothing changed since the last export
+            paths = [os.path.join(export_dir, name) for name, _ in FBX_TARGETS]
+            if not _scene_dirty and all(os.path.exists(path) for path in paths):
+                self.report({'INFO'}, f"Scene unchanged, exports in {export_dir} are up to date")
+                return {'FINISHED'}
             
-            # Export as FBX for Unreal (different settings)
-            fbx_unreal_path = os.path.join(export_dir, "scene_unreal.fbx")
-            bpy.ops.export_scene.fbx(
-                filepath=fbx_unreal_path,
-                use_selection=False,
-                use_active_collection=False,
-                global_scale=100.0,  # Unreal uses cm, Blender uses m
-                apply_unit_scale=True,
-                apply_scale_options='FBX_SCALE_ALL',
-                bake_space_transform=True,
-                object_types={'MESH', 'ARMATURE', 'EMPTY', 'CAMERA', 'LIGHT'},
-                use_mesh_modifiers=True,
-                mesh_smooth_type='OFF',
-                use_tspace=True,
-                use_custom_props=True,
-                add_leaf_bones=False,
-                primary_bone_axis='Y',
-                secondary_bone_axis='X',
-                use_armature_deform_only=False,
-                bake_anim=True,
-                bake_anim_use_all_bones=True,
-                bake_anim_use_nla_strips=True,
-                bake_anim_use_all_actions=True,
-                bake_anim_force_startend_keying=True,
-                bake_anim_step=1.0,
-                bake_anim_simplify_factor=1.0,
-                path_mode='AUTO',
-                embed_textures=False,
-                batch_mode='OFF',
-                use_metadata=True
+            # Without any modifiers the exporter can read mesh data directly
+            # instead of evaluating a temporary copy of every mesh
+            use_mesh_modifiers = any(
+                obj.modifiers for obj in context.scene.objects if obj.type == 'MESH'
             )
+            for path, (_, overrides) in zip(paths, FBX_TARGETS):
+                bpy.ops.export_scene.fbx(
+                    filepath=path, use_mesh_modifiers=use_mesh_modifiers,
+                    **FBX_COMMON_SETTINGS, **overrides
+                )
+            _scene_dirty = False
             
             self.report({'INFO'}, f"Scene exported to {export_dir}")
             return {'FINISHED'}
             
         except Exception as e:
             self.report({'ERROR'}, f"Export failed: {str(e)}")
-            return {'CANCELLED'}
\ No newline at end of file
+            return {'CANCELLED'}
+
+def register_handlers():
+    """Track scene changes so unchanged scenes are not re-exported"""
+    for handlers in (bpy.app.handlers.depsgraph_update_post, bpy.app.handlers.load_post):
+        if _mark_scene_dirty not in handlers:
+            handlers.append(_mark_scene_dirty)
+
+def unregister_handlers():
+    """Remove the scene change tracking handlers"""
+    for handlers in (bpy.app.handlers.depsgraph_update_post, bpy.app.handlers.load_post):
+        if _mark_scene_dirty in handlers:
+            handlers.remove(_mark_scene_dirty)
@@ -1,22 +1,192 @@
+import ast
+import builtins
+import importlib
 import bpy
+from bpy.app.handlers import persistent
 from bpy.types import Operator
-from bpy.props import StringProperty
-import os
-import sys
-
-# Add the parent directory to the path for imports
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-if parent_dir not in sys.path:
-    sys.path.append(parent_dir)
+from collections import OrderedDict
+from functools import lru_cache
+from types import ModuleType
 
 from .. import agent_bridge
 from .. import ui_panel
+from ..agent_core.modules.mesh_builders import SCRIPT_HELPERS
+
+# Modules generated scripts may import
+ALLOWED_IMPORTS = frozenset({'bpy', 'bmesh', 'mathutils', 'math', 'random', 'numpy', 'os'})
+# Submodules scripts may import or reach through attributes; any other
+# module-valued attribute (numpy.ctypeslib, os.path.os, ...) is rejected
+ALLOWED_SUBMODULES = frozenset({
+    'os.path', 'numpy.random', 'numpy.linalg', 'numpy.fft',
+    'mathutils.noise', 'mathutils.geometry', 'mathutils.bvhtree', 'mathutils.kdtree',
+    'mathutils.interpolate', 'bmesh.ops', 'bmesh.types', 'bmesh.utils', 'bmesh.geometry',
+    'bpy.ops', 'bpy.types', 'bpy.props', 'bpy.path',
+})
+# Modules whose members are allowlisted; other modules allow any public member.
+# os is needed for export paths only
+MODULE_MEMBERS = {
+    'os': frozenset({'path', 'makedirs', 'sep'}),
+    'os.path': frozenset({
+        'join', 'dirname', 'basename', 'splitext', 'exists', 'isdir', 'isfile',
+        'abspath', 'normpath', 'expanduser'
+    }),
+}
+# Builtins that would let a script escape the checks below
+BLOCKED_NAMES = frozenset({
+    'exec', 'eval', 'compile', 'open', '__import__', 'globals', 'locals',
+    'vars', 'getattr', 'setattr', 'delattr', 'input', 'breakpoint', '__builtins__'
+})
+# bpy.ops submodules that run files or text blocks, or load files and addons
+BLOCKED_OPS_MODULES = frozenset({'script', 'text', 'wm', 'preferences'})
+# Blender API members that execute arbitrary Python
+BLOCKED_ATTRIBUTES = frozenset({'execfile', 'as_module', 'driver_namespace'})
+
+def _check_module_path(path: str):
+    """Reject imports of modules outside ALLOWED_IMPORTS and ALLOWED_SUBMODULES"""
+    parts = path.split('.')
+    if parts[0] not in ALLOWED_IMPORTS:
+        raise ValueError(f"import of '{path}' is not allowed")
+    for i in range(2, len(parts) + 1):
+        if '.'.join(parts[:i]) not in ALLOWED_SUBMODULES:
+            raise ValueError(f"import of '{path}' is not allowed")
+
+def _resolve(path: str):
+    """Look up a dotted path from an allowed module, or None if it does not resolve"""
+    root, *attrs = path.split('.')
+    value = importlib.import_module(root)
+    for attr in attrs:
+        try:
+            value = getattr(value, attr)
+        except Exception:
+            return None
+    return value
+
+def _is_module_like(path: str, value) -> bool:
+    """Modules, plus bpy.ops and its operator submodules, which are not module objects"""
+    return (isinstance(value, ModuleType) or path == 'bpy.ops'
+            or (path.startswith('bpy.ops.') and path.count('.') == 2))
+
+def _check_member(path: str, value, attr: str):
+    """Reject reading `attr` off the module-like `value` found at `path`"""
+    members = MODULE_MEMBERS.get(path)
+    if members is not None and attr not in members:
+        raise ValueError(f"use of '{path}.{attr}' is not allowed")
+    if path == 'bpy.ops' and attr in BLOCKED_OPS_MODULES:
+        raise ValueError(f"use of 'bpy.ops.{attr}' is not allowed")
+    try:
+        member = getattr(value, attr, None)
+    except Exception:
+        member = None
+    if isinstance(member, ModuleType) and f"{path}.{attr}" not in ALLOWED_SUBMODULES:
+        raise ValueError(f"use of '{path}.{attr}' is not allowed")
+
+def _check_module_use(node: ast.Name, path: str, parents: dict):
+    """Follow the attribute chain read off a module name. Every module-like
+    value along it must be read from straight away, never bound, passed or
+    returned, so an unchecked alias can not reach its members."""
+    value = _resolve(path)
+    while _is_module_like(path, value):
+        parent = parents.get(node)
+        if not (isinstance(parent, ast.Attribute) and parent.value is node):
+            raise ValueError(f"'{path}' may only be used through its attributes")
+        _check_member(path, value, parent.attr)
+        path = f"{path}.{parent.attr}"
+        value = _resolve(path)
+        node = parent
+
+def _validate_generated(tree: ast.AST):
+    """Reject generated scripts that reach outside the Blender API. Imports and
+    module attributes are checked against allowlists; names and attributes
+    that start with an underscore are never allowed."""
+    # Name -> dotted path of the module or member an import bound it to
+    bindings = {'bpy': 'bpy'}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                _check_module_path(alias.name)
+                if alias.asname and '.' in alias.name:
+                    raise ValueError(f"'{alias.name}' may not be imported under another name")
+                root = alias.name.split('.', 1)[0]
+                bindings[alias.asname or root] = alias.name if alias.asname else root
+        elif isinstance(node, ast.ImportFrom):
+            if node.level or not node.module:
+                raise ValueError("relative imports are not allowed")
+            _check_module_path(node.module)
+            module = _resolve(node.module)
+            for alias in node.names:
+                if alias.name == '*':
+                    raise ValueError(f"'from {node.module} import *' is not allowed")
+                _check_member(node.module, module, alias.name)
+                bindings[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id in BLOCKED_NAMES or node.id.startswith('__'):
+                raise ValueError(f"use of '{node.id}' is not allowed")
+            path = bindings.get(node.id)
+            if path is not None:
+                _check_module_use(node, path, parents)
+        elif isinstance(node, ast.Attribute):
+            if node.attr.startswith('_') or node.attr in BLOCKED_ATTRIBUTES:
+                raise ValueError(f"access to '{node.attr}' is not allowed")
+
+def _guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """__import__ for generated scripts, limited to ALLOWED_IMPORTS"""
+    if level or name.split('.', 1)[0] not in ALLOWED_IMPORTS:
+        raise ImportError(f"import of '{name}' is not allowed")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+# Builtins generated scripts run with; the AST check rejects these names in
+# source, and leaving them out here stops them being reached any other way
+_SAFE_BUILTINS = {
+    name: value for name, value in vars(builtins).items() if name not in BLOCKED_NAMES
+}
+_SAFE_BUILTINS['__import__'] = _guarded_import
+
+# Generated scripts repeat verbatim for repeated prompts, so keep their
+# compiled code objects instead of re-parsing the source on every run
+COMPILED_CODE_CACHE_SIZE = 128
+
+@lru_cache(maxsize=COMPILED_CODE_CACHE_SIZE)
+def _compile_generated(code: str):
+    """Parse, validate and compile a generated script once per distinct source"""
+    tree = ast.parse(code, '<forgecore-generated>')
+    _validate_generated(tree)
+    return compile(tree, '<forgecore-generated>', 'exec')
+
+# (prompt, scene signature before the run) -> result text of prompts that ran
+# successfully. A prompt that adds objects changes the signature, so pressing
+# Run again adds more; one that leaves it unchanged is skipped the next time
+PROMPT_CACHE_SIZE = 64
+_PROMPT_CACHE = OrderedDict()
+
+@persistent
+def _clear_prompt_cache(*args):
+    """Handler that forgets skipped prompts once undo, redo or a file load may
+    have reverted their effects on an otherwise identical scene"""
+    _PROMPT_CACHE.clear()
+
+def _scene_signature(context):
+    """Fingerprint of what a prompt acts on: the objects, their transforms,
+    the selection and active object, and the current frame"""
+    active = context.view_layer.objects.active
+    return (
+        context.scene.frame_current,
+        active.name if active else None,
+        hash(tuple(
+            (obj.name, obj.select_get(), tuple(map(tuple, obj.matrix_world)))
+            for obj in bpy.data.objects
+        )),
+    )
 
 class FORGECORE_OT_run_prompt(Operator):
     bl_idname = "forgecore.run_prompt"
     bl_label = "Run AI Prompt"
     bl_description = "Execute the AI prompt and generate Blender code"
+    # One undo step per prompt; operators run by the generated code inside
+    # execute() do not push steps of their own. Not REGISTER: a redo from
+    # Adjust Last Operation would route and log the prompt again
+    bl_options = {'UNDO'}
     
     def execute(self, context):
         prompt = context.scene.forgecore_prompt.strip()
@@ -25,6 +195,17 @@ class FORGECORE_OT_run_prompt(Operator):
             self.report({'ERROR'}, "Please enter a prompt")
             return {'CANCELLED'}
         
+        # Nothing to do if this prompt already ran and the scene has not changed since
+        key = (prompt, _scene_signature(context))
+        cached = _PROMPT_CACHE.get(key)
+        if cached is not None:
+            _PROMPT_CACHE.move_to_end(key)
+            context.scene.forgecore_status = "Cached result"
+            context.scene.forgecore_last_result = cached
+            self.report({'INFO'}, "Prompt already applied to this scene")
+            # Cancelled so no empty undo step is pushed
+            return {'CANCELLED'}
+        
         try:
             # Get the agent bridge
             bridge = agent_bridge.get_bridge()
@@ -37,16 +218,20 @@ class FORGECORE_OT_run_prompt(Operator):
             
             # Handle the prompt
             blender_code = bridge.handle_prompt(prompt)
+            ui_panel.refresh_activity()
             
             # Execute the generated code
             if blender_code and not blender_code.startswith("# Error"):
                 try:
                     # Execute the code in Blender's context
-                    exec(blender_code, {"bpy": bpy, "__builtins__": __builtins__})
+                    exec(_compile_generated(blender_code), {"bpy": bpy, "__builtins__": _SAFE_BUILTINS, **SCRIPT_HELPERS})
                     
                     # Update status and result
                     context.scene.forgecore_status = "Success! Code executed."
                     context.scene.forgecore_last_result = f"Generated and executed code for: {prompt[:50]}..."
+                    _PROMPT_CACHE[key] = context.scene.forgecore_last_result
+                    if len(_PROMPT_CACHE) > PROMPT_CACHE_SIZE:
+                        _PROMPT_CACHE.popitem(last=False)
                     
                     self.report({'INFO'}, "Prompt executed successfully")
                     
@@ -103,4 +288,21 @@ class FORGECORE_OT_save_journal(Operator):
         except Exception as e:
             error_msg = f"Error saving journal entry: {str(e)}"
             self.report({'ERROR'}, error_msg)
-            return {'CANCELLED'}
\ No newline at end of file
+            return {'CANCELLED'}
+
+# Handlers after which a cached prompt may no longer be applied to the scene
+_CACHE_RESET_HANDLERS = ('undo_post', 'redo_post', 'load_post')
+
+def register_handlers():
+    """Drop cached prompts whenever the scene may have been reverted"""
+    for name in _CACHE_RESET_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if _clear_prompt_cache not in handlers:
+            handlers.append(_clear_prompt_cache)
+
+def unregister_handlers():
+    """Remove the prompt cache reset handlers"""
+    for name in _CACHE_RESET_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if _clear_prompt_cache in handlers:
+            handlers.remove(_clear_prompt_cache)
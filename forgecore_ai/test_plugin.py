@@ -7,6 +7,11 @@ import bpy
 import sys
 import os
 
+# Plugin paths, resolved once for all tests
+_DIR = os.path.dirname(os.path.abspath(__file__))
+_MEMORY = os.path.join(_DIR, 'agent_core', 'memory')
+_MEMORY_STORE = os.path.join(_MEMORY, 'memory_store.json')
+
 def test_plugin_structure():
     """Test the plugin structure and basic functionality"""
     print("=== ForgeCore AI Plugin Test ===")
@@ -34,9 +39,8 @@ def test_plugin_structure():
     # Test 3: Test agent core functionality
     try:
         # Import the agent core
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        if current_dir not in sys.path:
-            sys.path.append(current_dir)
+        if _DIR not in sys.path:
+            sys.path.append(_DIR)
         
         from agent_core.main import handle_prompt
         
@@ -56,10 +60,13 @@ def test_plugin_structure():
     
     # Test 4: Check memory system
     try:
-        memory_dir = os.path.join(current_dir, "agent_core", "memory")
-        memory_file = os.path.join(memory_dir, "memory_store.json")
+        try:
+            os.stat(_MEMORY_STORE)
+            accessible = True
+        except FileNotFoundError:
+            accessible = False
         
-        if os.path.exists(memory_file):
+        if accessible:
             print("✓ Memory system is accessible")
         else:
             print("✗ Memory system is not accessible")
@@ -98,6 +105,54 @@ def test_prompt_execution():
         except Exception as e:
             print(f"✗ Error: {e}")
 
+# Prompt -> category the original substring-scan router sent it to; the
+# token router must agree, including on plurals and derived words
+ROUTING_EXPECTATIONS = (
+    ("Create a red cube", 'mesh'),
+    ("add three cubes", 'mesh'),
+    ("merge meshes", 'mesh'),
+    ("smooth the meshes", 'mesh'),
+    ("recreate it", 'mesh'),
+    ("make it metallic", 'material'),
+    ("woodgrain look", 'material'),
+    ("positioning stuff", 'layout'),
+    ("arrangement please", 'layout'),
+    ("rendering", 'camera'),
+    ("lighten up", 'lighting'),
+    ("Set up studio lighting", 'lighting'),
+    ("keyframes please", 'animation'),
+    ("exporting now", 'export'),
+    ("how do i bevel", 'knowledge'),
+    ("web search: blender", 'tool'),
+    ("generate terrain", 'procedural'),
+    ("analyze scene", 'layout'),
+    ("deselect everything", 'utility'),
+)
+
+def test_prompt_routing():
+    """Test that prompts route to the same categories as before tokenized routing"""
+    print("\n=== Testing Prompt Routing ===")
+    
+    try:
+        if _DIR not in sys.path:
+            sys.path.append(_DIR)
+        
+        from agent_core.main import _classify_prompt
+        
+        failures = [
+            (prompt, expected, _classify_prompt(prompt))
+            for prompt, expected in ROUTING_EXPECTATIONS
+            if _classify_prompt(prompt) != expected
+        ]
+        if failures:
+            for prompt, expected, actual in failures:
+                print(f"✗ '{prompt}' routed to {actual}, expected {expected}")
+        else:
+            print(f"✓ All {len(ROUTING_EXPECTATIONS)} prompts routed as before")
+            
+    except Exception as e:
+        print(f"✗ Error testing routing: {e}")
+
 def test_journal_functionality():
     """Test journal functionality"""
     print("\n=== Testing Journal Functionality ===")
@@ -123,6 +178,7 @@ if __name__ == "__main__":
     # Run all tests
     test_plugin_structure()
     test_prompt_execution()
+    test_prompt_routing()
     test_journal_functionality()
     
     print("\n=== All Tests Complete ===")
@@ -1,10 +1,57 @@
 import bpy
-from bpy.types import Panel
-from bpy.props import StringProperty
+from bpy.props import CollectionProperty, IntProperty, StringProperty
+from bpy.types import Panel, PropertyGroup, UIList
 import os
-import json
 from datetime import datetime
 
+from .agent_core import json_utils
+
+# Imported once here rather than on every refresh; the panel still draws
+# if the agent package fails to load
+try:
+    from .agent_bridge import AgentBridge, format_timestamp
+    from .agent_core.main import shorten_result
+except Exception as e:
+    print(f"ForgeCore AI: Agent bridge unavailable in panel: {e}")
+    AgentBridge = None
+
+# Resolved once at import rather than on every draw or save
+_ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+_MEMORY_DIR = os.path.join(_ADDON_DIR, "agent_core", "memory")
+_JOURNAL_FILE = os.path.join(_MEMORY_DIR, "journal_entries.jsonl")
+_LEGACY_JOURNAL_FILE = os.path.join(_MEMORY_DIR, "journal_entries.json")
+
+# Journal entries shown in the panel, and the read size used to find them
+JOURNAL_DISPLAY_ENTRIES = 5
+JOURNAL_TAIL_BLOCK = 4096
+# Seconds between journal reloads for the panel
+JOURNAL_REFRESH_INTERVAL = 3.0
+# Seconds between syncs of agent history and sub-agent results into the panel lists
+ACTIVITY_REFRESH_INTERVAL = 0.5
+# Rows shown by the history and sub-agent lists before they scroll
+ACTIVITY_LIST_ROWS = 5
+
+class FORGECORE_PG_activity_entry(PropertyGroup):
+    """One prompt/result row mirrored from the agent core for the panel lists"""
+    result: StringProperty(name="Result", default="")
+    time: StringProperty(name="Time", default="")
+
+class FORGECORE_UL_activity(UIList):
+    """Prompt/result list; Blender only lays out the rows that are visible"""
+    bl_idname = "FORGECORE_UL_activity"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.label(text=item.name)
+        row.label(text=item.result)
+        if item.time:
+            row.label(text=item.time)
+
+    def filter_items(self, context, data, propname):
+        # Newest entries first
+        count = len(getattr(data, propname))
+        return [], [count - 1 - i for i in range(count)]
+
 class FORGECORE_PT_main_panel(Panel):
     bl_label = "ForgeCore AI"
     bl_idname = "FORGECORE_PT_main_panel"
@@ -30,93 +77,65 @@ class FORGECORE_PT_main_panel(Panel):
         # --- Knowledge Q&A section ---
         box = layout.box()
         box.label(text="Ask a Blender Question", icon='QUESTION')
-        if not hasattr(context.scene, 'forgecore_qa_question'):
-            context.scene["forgecore_qa_question"] = ""
-        if not hasattr(context.scene, 'forgecore_qa_answer'):
-            context.scene["forgecore_qa_answer"] = ""
         box.prop(context.scene, 'forgecore_qa_question', text="Question")
         row = box.row()
         row.operator("forgecore.ask_qa", text="Ask", icon='QUESTION')
-        if context.scene.get('forgecore_qa_answer'):
-            box.label(text=f"Answer: {context.scene['forgecore_qa_answer']}")
+        answer = getattr(context.scene, 'forgecore_qa_answer', '')
+        if answer:
+            box.label(text=f"Answer: {answer}")
         # --- End Knowledge Q&A section ---
         
         # Status section
-        if hasattr(context.scene, 'forgecore_status'):
+        status = getattr(context.scene, 'forgecore_status', '')
+        if status:
             box = layout.box()
             box.label(text="Status", icon='INFO')
-            box.label(text=context.scene.forgecore_status)
+            box.label(text=status)
         
-        # Sub-agent activity/results
-        try:
-            # Import AgentBridge here to avoid Blender import issues
-            from .agent_bridge import AgentBridge
-            bridge = getattr(AgentBridge, 'instance', None)
-            if bridge and bridge.agent_core:
-                sub_agent_activity = bridge.agent_core.get_sub_agent_activity()
-                if sub_agent_activity:
-                    box = layout.box()
-                    box.label(text="Sub-Agent Activity", icon='GROUP')
-                    for entry in sub_agent_activity:
-                        col = box.column()
-                        col.label(text=f"Prompt: {entry['prompt']}")
-                        col.label(text=f"Result: {entry['result'][:60]}..." if len(entry['result']) > 60 else f"Result: {entry['result']}")
-                        col.separator()
-        except Exception as e:
-            layout.label(text=f"Sub-agent info error: {e}")
+        # Sub-agent activity/results, mirrored into the scene by refresh_activity
+        if context.scene.forgecore_sub_agents:
+            box = layout.box()
+            box.label(text="Sub-Agent Activity", icon='GROUP')
+            box.template_list("FORGECORE_UL_activity", "sub_agents", context.scene, "forgecore_sub_agents",
+                              context.scene, "forgecore_sub_agents_index", rows=ACTIVITY_LIST_ROWS)
         
         # Recent results
-        if hasattr(context.scene, 'forgecore_last_result'):
+        last_result = getattr(context.scene, 'forgecore_last_result', '')
+        if last_result:
             box = layout.box()
             box.label(text="Last Result", icon='FILE_TEXT')
-            box.label(text=context.scene.forgecore_last_result)
+            box.label(text=last_result)
 
         # --- Tools section ---
         box = layout.box()
         box.label(text="Tools", icon='TOOL_SETTINGS')
-        if not hasattr(context.scene, 'forgecore_tool_input'):
-            context.scene["forgecore_tool_input"] = ""
-        if not hasattr(context.scene, 'forgecore_tool_result'):
-            context.scene["forgecore_tool_result"] = ""
         box.prop(context.scene, 'forgecore_tool_input', text="Tool Command")
         row = box.row()
         row.operator("forgecore.run_tool", text="Run Tool", icon='CONSOLE')
-        if context.scene.get('forgecore_tool_result'):
-            box.label(text=f"Result: {context.scene['forgecore_tool_result']}")
+        tool_result = getattr(context.scene, 'forgecore_tool_result', '')
+        if tool_result:
+            box.label(text=f"Result: {tool_result}")
         # --- End Tools section ---
         # --- Memory/History section ---
         box = layout.box()
         box.label(text="Memory & History", icon='TIME')
         row = box.row()
         row.operator("forgecore.clear_history", text="Clear History", icon='TRASH')
-        # Display last 5 history entries
-        try:
-            from .agent_bridge import AgentBridge
-            bridge = getattr(AgentBridge, 'instance', None)
-            if bridge and bridge.agent_core:
-                history = bridge.agent_core.get_history()
-                for entry in history[-5:]:
-                    col = box.column()
-                    col.label(text=f"Prompt: {entry['prompt']}")
-                    col.label(text=f"Result: {entry['result'][:60]}..." if len(entry['result']) > 60 else f"Result: {entry['result']}")
-                    col.label(text=f"Time: {entry['timestamp']}")
-                    col.separator()
-        except Exception as e:
-            box.label(text=f"History error: {e}")
+        box.template_list("FORGECORE_UL_activity", "history", context.scene, "forgecore_history",
+                          context.scene, "forgecore_history_index", rows=ACTIVITY_LIST_ROWS)
         # --- End Memory/History section ---
         # --- Scene Analysis section ---
         box = layout.box()
         box.label(text="Scene Analysis", icon='INFO')
         row = box.row()
         row.operator("forgecore.analyze_scene", text="Analyze Scene", icon='VIEWZOOM')
-        if hasattr(context.scene, 'forgecore_scene_summary') and context.scene.forgecore_scene_summary:
-            box.label(text=f"Summary: {context.scene.forgecore_scene_summary}")
+        scene_summary = getattr(context.scene, 'forgecore_scene_summary', '')
+        if scene_summary:
+            box.label(text=f"Summary: {scene_summary}")
         # --- End Scene Analysis section ---
         # --- External Server Settings section ---
         box = layout.box()
         box.label(text="External Server", icon='URL')
-        if not hasattr(context.scene, 'forgecore_server_address'):
-            context.scene["forgecore_server_address"] = ""
         box.prop(context.scene, 'forgecore_server_address', text="Server Address")
         # --- End External Server Settings section ---
 
@@ -149,61 +168,162 @@ class FORGECORE_PT_journal_panel(Panel):
         box = layout.box()
         box.label(text="Recent Entries", icon='HISTORY')
         
-        # Load and display recent entries
-        journal_entries = self.load_journal_entries()
-        for entry in journal_entries[-5:]:  # Show last 5 entries
+        # Display the entries last loaded by the refresh timer; draw runs on
+        # every repaint, so it never touches the disk itself
+        for entry in self._journal_cache['entries']:
             col = box.column()
             col.label(text=f"Date: {entry.get('date', 'Unknown')}")
             col.label(text=f"Goal: {entry.get('goal', '')}")
             col.label(text=f"Progress: {entry.get('progress', '')}")
             col.separator()
 
-    def load_journal_entries(self):
-        """Load journal entries from the memory file"""
+    # Newest journal entries plus the file state they were read at
+    _journal_cache = {'key': None, 'entries': []}
+
+    @classmethod
+    def load_journal_entries(cls, limit=JOURNAL_DISPLAY_ENTRIES):
+        """Load the newest journal entries, reading only the tail of the memory file"""
+        cache = cls._journal_cache
         try:
-            # Get the addon directory
-            addon_dir = os.path.dirname(os.path.abspath(__file__))
-            memory_dir = os.path.join(addon_dir, "agent_core", "memory")
-            journal_file = os.path.join(memory_dir, "journal_entries.json")
-            
-            if os.path.exists(journal_file):
-                with open(journal_file, 'r') as f:
-                    return json.load(f)
-            else:
-                return []
+            _migrate_legacy_journal()
+            try:
+                stat = os.stat(_JOURNAL_FILE)
+            except FileNotFoundError:
+                cache.update(key=None, entries=[])
+                return cache['entries']
+            key = (stat.st_mtime_ns, stat.st_size, limit)
+            if key != cache['key']:
+                cache.update(key=key, entries=_tail_jsonl(_JOURNAL_FILE, limit))
+            return cache['entries']
         except Exception as e:
             print(f"Error loading journal entries: {e}")
             return []
 
+def refresh_journal():
+    """Timer callback that reloads the journal entries shown in the panel"""
+    FORGECORE_PT_journal_panel.load_journal_entries()
+    return JOURNAL_REFRESH_INTERVAL
+
+def _sync_activity(scene, propname, entries, token, with_time):
+    """Mirror agent entries into a scene collection, appending when the list only grew"""
+    collection = getattr(scene, propname)
+    token_prop = propname + "_token"
+    # The scene stores the token its rows were built under, so undo, which
+    # rolls back the rows, rolls back the token with them
+    if getattr(scene, token_prop) == token and len(collection) <= len(entries):
+        if len(collection) == len(entries):
+            return False
+        new_entries = entries[len(collection):]
+    else:
+        collection.clear()
+        new_entries = entries
+    for entry in new_entries:
+        # History loaded from disk has no cached preview yet; build it
+        # once and keep it on the entry
+        short_result = entry.get('short_result')
+        if short_result is None:
+            short_result = entry['short_result'] = shorten_result(entry['result'])
+        item = collection.add()
+        item.name = entry['prompt']
+        item.result = short_result
+        if with_time:
+            item.time = format_timestamp(entry['timestamp'])
+    setattr(scene, token_prop, token)
+    return True
+
+def refresh_activity():
+    """Timer callback that syncs agent history and sub-agent results into the panel lists"""
+    try:
+        scene = bpy.context.scene
+        bridge = getattr(AgentBridge, 'instance', None) if AgentBridge else None
+        if scene is None or not (bridge and bridge.agent_core):
+            return ACTIVITY_REFRESH_INTERVAL
+        agent_core = bridge.agent_core
+        token = agent_core.activity_token
+        changed = _sync_activity(scene, 'forgecore_history', agent_core.get_history(), token, True)
+        changed |= _sync_activity(scene, 'forgecore_sub_agents', agent_core.get_sub_agent_activity(), token, False)
+        if changed:
+            for area in bpy.context.screen.areas if bpy.context.screen else ():
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+    except Exception as e:
+        print(f"Error refreshing agent activity: {e}")
+    return ACTIVITY_REFRESH_INTERVAL
+
+def register_properties():
+    """Add the scene collections behind the activity lists; needs the entry class registered"""
+    bpy.types.Scene.forgecore_history = CollectionProperty(type=FORGECORE_PG_activity_entry)
+    bpy.types.Scene.forgecore_history_index = IntProperty(default=-1)
+    bpy.types.Scene.forgecore_history_token = StringProperty(default="")
+    bpy.types.Scene.forgecore_sub_agents = CollectionProperty(type=FORGECORE_PG_activity_entry)
+    bpy.types.Scene.forgecore_sub_agents_index = IntProperty(default=-1)
+    bpy.types.Scene.forgecore_sub_agents_token = StringProperty(default="")
+
+def unregister_properties():
+    """Remove the scene collections behind the activity lists"""
+    for name in ('forgecore_history', 'forgecore_history_index', 'forgecore_history_token',
+                 'forgecore_sub_agents', 'forgecore_sub_agents_index', 'forgecore_sub_agents_token'):
+        if hasattr(bpy.types.Scene, name):
+            delattr(bpy.types.Scene, name)
+
+def register_timers():
+    """Start refreshing the journal panel and activity lists in the background"""
+    for timer in (refresh_journal, refresh_activity):
+        if not bpy.app.timers.is_registered(timer):
+            bpy.app.timers.register(timer, first_interval=0.0, persistent=True)
+
+def unregister_timers():
+    """Stop the journal panel and activity list refresh"""
+    for timer in (refresh_journal, refresh_activity):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+
+def _tail_jsonl(path, limit):
+    """Parse the last `limit` lines of a JSONL file, reading it backwards in blocks"""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b''
+        # One extra newline guarantees the oldest wanted line is complete
+        while pos > 0 and data.count(b'\n') <= limit:
+            step = min(JOURNAL_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    if pos > 0:
+        # Drop the text before the first newline, which may be a partial line
+        data = data[data.index(b'\n') + 1:]
+    lines = [line for line in data.splitlines() if line.strip()]
+    return [json_utils.loads(line) for line in lines[-limit:]]
+
+def _migrate_legacy_journal():
+    """Convert the old whole-file JSON journal into the append-only JSONL journal"""
+    if not os.path.exists(_LEGACY_JOURNAL_FILE):
+        return
+    with open(_LEGACY_JOURNAL_FILE, 'r') as f:
+        entries = json_utils.load(f)
+    with open(_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.writelines(json_utils.dumps(entry) + "\n" for entry in entries)
+    os.remove(_LEGACY_JOURNAL_FILE)
+
 def save_journal_entry(goal, progress):
-    """Save a journal entry to the memory file"""
+    """Append a journal entry to the memory file"""
     try:
-        # Get the addon directory
-        addon_dir = os.path.dirname(os.path.abspath(__file__))
-        memory_dir = os.path.join(addon_dir, "agent_core", "memory")
-        os.makedirs(memory_dir, exist_ok=True)
+        os.makedirs(_MEMORY_DIR, exist_ok=True)
+        _migrate_legacy_journal()
         
-        journal_file = os.path.join(memory_dir, "journal_entries.json")
-        
-        # Load existing entries
-        entries = []
-        if os.path.exists(journal_file):
-            with open(journal_file, 'r') as f:
-                entries = json.load(f)
-        
-        # Add new entry
         new_entry = {
             'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'goal': goal,
             'progress': progress
         }
-        entries.append(new_entry)
         
-        # Save back to file
-        with open(journal_file, 'w') as f:
-            json.dump(entries, f, indent=2)
-            
+        # One line per entry; existing entries are never rewritten
+        with open(_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write(json_utils.dumps(new_entry) + "\n")
+        
+        # Show the new entry without waiting for the next refresh
+        FORGECORE_PT_journal_panel.load_journal_entries()
         return True
     except Exception as e:
         print(f"Error saving journal entry: {e}")
-        return False
\ No newline at end of file
+        return False